@@ -33,6 +33,17 @@ def get_current_user(
     return user
 
 
+def get_current_user_released(
+    db: Session = Depends(get_db),
+    authorization: str | None = Header(default=None),
+) -> User:
+    # For routes that wait on slow outbound calls: the pooled connection goes back right
+    # after authentication instead of when the response is sent. The user stays readable.
+    user = get_current_user(db, authorization)
+    db.close()
+    return user
+
+
 def require_admin(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != "ADMIN":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized as an admin")
@@ -43,3 +54,8 @@ def require_prof_or_admin(current_user: User = Depends(get_current_user)) -> Use
     if current_user.role not in {"PROF", "ADMIN"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Requires PROF or ADMIN role")
     return current_user
+
+
+def require_prof_or_admin_released(current_user: User = Depends(get_current_user_released)) -> User:
+    # Same check without holding a pooled connection, for routes that stream a slow body.
+    return require_prof_or_admin(current_user)
@@ -9,6 +9,7 @@ from app.core.security import create_access_token, hash_password, verify_passwor
 from app.core.database import get_db
 from app.models import User, UserStats
 from app.schemas.auth import AuthResponse, LoginRequest, MeResponse, RegisterRequest
+from app.services.leaderboard import leaderboards
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -36,6 +37,7 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
     stats = UserStats(userId=user.id)
     db.add(stats)
     db.commit()
+    leaderboards.add_student(user.id, 0, [])
 
     token = create_access_token({"id": user.id, "role": user.role})
     return AuthResponse(
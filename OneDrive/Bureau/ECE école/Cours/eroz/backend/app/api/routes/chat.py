@@ -1,52 +1,292 @@
 ﻿from __future__ import annotations
 
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+import json
 import logging
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_released, require_admin
 from app.core.config import settings
-from app.core.database import get_db
-from app.models import TrainingSession, User, UserStats
-from app.schemas.chat import ChatRequest, ChatResponse
-from app.services.chat import generate_chat_response
+from app.core.database import SessionLocal
+from app.models import User
+from app.schemas.chat import (
+    ChatRequest,
+    ChatResponse,
+    ConversationMessageRequest,
+    ConversationMessageResponse,
+    ConversationResponse,
+)
+from app.services.chat import (
+    ChatContext,
+    cache_response,
+    chat_role,
+    coalesce_stats,
+    context_cache,
+    faq_for,
+    generate_chat_response,
+    get_chat_context,
+    message_dicts,
+    response_cache,
+    response_cache_key,
+    stream_chat_response,
+)
+from app.services.chat_history import HistorySummary, history_stats, load_summary, schedule_summary
+from app.services.conversations import (
+    Conversation,
+    append_turn,
+    conversation_cache,
+    create_conversation,
+    delete_conversation,
+    get_conversation,
+)
+from app.services.faq import faq_stats
+from app.services.llm import LLMUnavailable, acquire_llm, guard_stats, release_llm
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 logger = logging.getLogger(__name__)
 
+NOT_CONFIGURED_MESSAGE = (
+    "Le chatbot n'est pas configure. Ajoute GROQ_API_KEY dans le fichier .env et redemarre les conteneurs."
+)
+UPSTREAM_ERROR_MESSAGE = (
+    "Desole, je rencontre un probleme de connexion avec mon cerveau (Groq). Reessaie plus tard !"
+)
+BUSY_MESSAGE = "L'assistant est tres sollicite en ce moment. Reessaie dans quelques secondes !"
 
-@router.post("", response_model=ChatResponse)
-def chat(
-    payload: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+def _in_session(fn, *args):
+    # Short-lived session per DB step: nothing is held while the LLM answers.
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _unavailable(exc: LLMUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=BUSY_MESSAGE if exc.reason == "busy" else UPSTREAM_ERROR_MESSAGE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _load_context(db: Session, user_id: int, history: list[dict]) -> tuple[ChatContext, HistorySummary]:
+    # Sessions connect lazily: with a cached context and a short history this touches no DB.
+    return get_chat_context(db, user_id), load_summary(db, user_id, history)
+
+
+@dataclass
+class _Reply:
+    cached: str | None = None
+    history: list[dict] | None = None
+    context: ChatContext | None = None
+    cache_key: str | None = None
+    system_prompt: str | None = None
+
+
+async def _prepare(history: list[dict], current_user: User) -> _Reply:
+    # Platform questions the FAQ index is confident about never reach the DB or the LLM.
+    faq = faq_for(history, chat_role(current_user))
+    if faq.answer:
+        return _Reply(cached=faq.answer)
     if not settings.groq_api_key:
-        return ChatResponse(
-            message="Le chatbot n'est pas configure. Ajoute GROQ_API_KEY dans le fichier .env et redemarre les conteneurs."
-        )
+        return _Reply(cached=NOT_CONFIGURED_MESSAGE)
 
-    user = db.get(User, current_user.id)
-    stats = db.query(UserStats).filter(UserStats.userId == current_user.id).first()
-    sessions = (
-        db.query(TrainingSession)
-        .filter(TrainingSession.userId == current_user.id)
-        .order_by(TrainingSession.completedAt.desc())
-        .limit(5)
-        .all()
+    context, summary = await run_in_threadpool(_in_session, _load_context, current_user.id, history)
+    cache_key = response_cache_key(history, context)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return _Reply(cached=cached)
+
+    schedule_summary(current_user.id, summary)
+    return _Reply(
+        history=history,
+        context=context,
+        cache_key=cache_key,
+        system_prompt=context.system_prompt(faq.knowledge, summary.text),
     )
 
+
+async def _complete(reply: _Reply) -> str:
+    if reply.cached is not None:
+        return reply.cached
     try:
-        message = generate_chat_response(
-            messages=payload.messages,
-            user=user,
-            stats=stats,
-            sessions=sessions,
+        message = await generate_chat_response(
+            messages=reply.history,
+            system_prompt=reply.system_prompt,
+            share_key=reply.cache_key,
+            names=reply.context.names,
         )
-        return ChatResponse(message=message)
+    except LLMUnavailable as exc:
+        raise _unavailable(exc) from exc
     except Exception as exc:
         logger.exception("Chatbot error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Desole, je rencontre un probleme de connexion avec mon cerveau (Groq). Reessaie plus tard !",
+            detail=UPSTREAM_ERROR_MESSAGE,
         ) from exc
+    cache_response(reply.cache_key, message, reply.context)
+    return message
+
+
+class _Slot:
+    # Released by the stream itself, or by the response's background task when the client
+    # left before the body generator ever started.
+    def __init__(self):
+        self.held = True
+
+    def release(self, error: BaseException | None = None) -> None:
+        if self.held:
+            self.held = False
+            release_llm(error)
+
+
+async def _stream(
+    reply: _Reply,
+    done: dict | None = None,
+    on_complete: Callable[[str], Awaitable[None]] | None = None,
+) -> StreamingResponse:
+    # Server-Sent Events: "delta" events carry the reply as the LLM produces it, then a
+    # single "done" or "error" event ends the stream.
+    slot = None
+    if reply.cached is None:
+        # Taken before the response starts so overload is still a plain 503.
+        try:
+            await acquire_llm()
+        except LLMUnavailable as exc:
+            raise _unavailable(exc) from exc
+        slot = _Slot()
+
+    async def events():
+        if reply.cached is not None:
+            answer = reply.cached
+            yield _sse("delta", {"content": answer})
+        else:
+            parts: list[str] = []
+            error: BaseException | None = None
+            try:
+                async for delta in stream_chat_response(messages=reply.history, system_prompt=reply.system_prompt):
+                    parts.append(delta)
+                    yield _sse("delta", {"content": delta})
+            except Exception as exc:
+                error = exc
+                logger.exception("Chatbot stream error")
+                yield _sse("error", {"detail": UPSTREAM_ERROR_MESSAGE})
+                return
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                slot.release(error)
+            # Only complete replies are kept; a disconnect never reaches this line.
+            answer = "".join(parts)
+            cache_response(reply.cache_key, answer, reply.context)
+        if on_complete is not None:
+            await on_complete(answer)
+        yield _sse("done", done or {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.release) if slot else None,
+    )
+
+
+@router.post("", response_model=ChatResponse)
+async def chat(
+    payload: ChatRequest,
+    current_user: User = Depends(get_current_user_released),
+):
+    reply = await _prepare(message_dicts(payload.messages), current_user)
+    return ChatResponse(message=await _complete(reply))
+
+
+@router.post("/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    current_user: User = Depends(get_current_user_released),
+):
+    return await _stream(await _prepare(message_dicts(payload.messages), current_user))
+
+
+async def _conversation_for(conversation_id: str | None, current_user: User) -> Conversation:
+    if conversation_id is None:
+        return await run_in_threadpool(_in_session, create_conversation, current_user.id)
+    conversation = conversation_cache.get(conversation_id)
+    if conversation is None or conversation.userId != current_user.id:
+        conversation = await run_in_threadpool(_in_session, get_conversation, conversation_id, current_user.id)
+    if conversation is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+    return conversation
+
+
+@router.post("/messages", response_model=ConversationMessageResponse)
+async def send_message(
+    payload: ConversationMessageRequest,
+    current_user: User = Depends(get_current_user_released),
+):
+    # Server-side history: the client sends only the new message.
+    conversation = await _conversation_for(payload.conversationId, current_user)
+    history = [*conversation.messages, {"role": "user", "content": payload.message}]
+    message = await _complete(await _prepare(history, current_user))
+    await run_in_threadpool(append_turn, conversation, payload.message, message)
+    return ConversationMessageResponse(conversationId=conversation.id, message=message)
+
+
+@router.post("/messages/stream")
+async def send_message_stream(
+    payload: ConversationMessageRequest,
+    current_user: User = Depends(get_current_user_released),
+):
+    conversation = await _conversation_for(payload.conversationId, current_user)
+    history = [*conversation.messages, {"role": "user", "content": payload.message}]
+    reply = await _prepare(history, current_user)
+
+    async def store(answer: str) -> None:
+        await run_in_threadpool(append_turn, conversation, payload.message, answer)
+
+    return await _stream(reply, done={"conversationId": conversation.id}, on_complete=store)
+
+
+@router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation_detail(
+    conversation_id: str,
+    current_user: User = Depends(get_current_user_released),
+):
+    conversation = await _conversation_for(conversation_id, current_user)
+    return ConversationResponse(id=conversation.id, messages=conversation.messages, updatedAt=conversation.updatedAt)
+
+
+@router.delete("/conversations/{conversation_id}")
+async def remove_conversation(
+    conversation_id: str,
+    current_user: User = Depends(get_current_user_released),
+):
+    conversation = await _conversation_for(conversation_id, current_user)
+    await run_in_threadpool(_in_session, delete_conversation, conversation)
+    return {"message": "Conversation deleted"}
+
+
+@router.get("/metrics")
+def chat_metrics(current_user: User = Depends(require_admin)):
+    return {
+        "responseCache": response_cache.stats(),
+        "conversationCache": conversation_cache.stats(),
+        "contextCache": context_cache.stats(),
+        "faq": dict(faq_stats),
+        "coalescing": dict(coalesce_stats),
+        **guard_stats(),
+        **history_stats(),
+    }
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_current_user, require_prof_or_admin
 from app.core.database import get_db
 from app.models import Classroom, Enrollment, User
+from app.schemas.analytics import ClassAnalyticsResponse
 from app.schemas.classroom import (
     ClassroomCreate,
     ClassroomDetailResponse,
@@ -17,6 +18,8 @@ from app.schemas.classroom import (
     EnrollmentStudentResponse,
     JoinByCodeRequest,
 )
+from app.services.analytics import class_analytics, invalidate_analytics
+from app.services.leaderboard import leaderboards
 
 router = APIRouter(prefix="/classes", tags=["classes"])
 
@@ -52,6 +55,8 @@ def join_class_by_code(
     )
     db.add(enrollment)
     db.commit()
+    leaderboards.enroll(current_user.id, classroom.id)
+    invalidate_analytics(classroom.id, [series.id for series in classroom.series])
     return {"message": "Enrolled successfully", "classroomId": classroom.id, "classroomName": classroom.name}
 
 
@@ -234,9 +239,23 @@ def delete_class(
     if classroom.ownerId != current_user.id and current_user.role != "ADMIN":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your class")
 
+    series_ids = [series.id for series in classroom.series]
     db.delete(classroom)
     db.commit()
+    leaderboards.remove_classroom(class_id)
+    invalidate_analytics(class_id, series_ids)
     return {"message": "Class deleted"}
 
 
-
+@router.get("/{class_id}/analytics", response_model=ClassAnalyticsResponse)
+def get_class_analytics(
+    class_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_prof_or_admin),
+):
+    classroom = db.get(Classroom, class_id)
+    if not classroom:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
+    if classroom.ownerId != current_user.id and current_user.role != "ADMIN":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your class")
+    return class_analytics(db, class_id)
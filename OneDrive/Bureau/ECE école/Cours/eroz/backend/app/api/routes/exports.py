@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+from app.api.deps import require_admin, require_prof_or_admin
+from app.core.database import get_db
+from app.models import Classroom, Series, User
+from app.services.export import (
+    EXPORT_FORMATS,
+    gradebook_query,
+    iter_export,
+    series_results_query,
+    sessions_query,
+)
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+def _export(request: Request, statement: Select, format: str, filename: str) -> StreamingResponse:
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid format")
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{format}"',
+        "Cache-Control": "private, no-store",
+        "Vary": "Accept-Encoding",
+        "X-Accel-Buffering": "no",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        iter_export(statement, format, compress),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers,
+    )
+
+
+@router.get("/classes/{class_id}/gradebook")
+def export_gradebook(
+    class_id: int,
+    request: Request,
+    format: str = Query(default="csv"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_prof_or_admin),
+):
+    classroom = db.get(Classroom, class_id)
+    if not classroom:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
+    if classroom.ownerId != current_user.id and current_user.role != "ADMIN":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your class")
+    return _export(request, gradebook_query(class_id), format, f"class-{class_id}-gradebook")
+
+
+@router.get("/series/{series_id}/results")
+def export_series_results(
+    series_id: int,
+    request: Request,
+    format: str = Query(default="csv"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_prof_or_admin),
+):
+    series = db.get(Series, series_id)
+    if not series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Series not found")
+    if current_user.role != "ADMIN":
+        owner_id = db.query(Classroom.ownerId).filter(Classroom.id == series.classroomId).scalar()
+        if owner_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your series")
+    return _export(request, series_results_query(series), format, f"series-{series_id}-results")
+
+
+@router.get("/sessions")
+def export_sessions(
+    request: Request,
+    format: str = Query(default="csv"),
+    user_id: int | None = Query(default=None, alias="userId"),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    _: User = Depends(require_admin),
+):
+    return _export(request, sessions_query(user_id, since, until), format, "training-sessions")
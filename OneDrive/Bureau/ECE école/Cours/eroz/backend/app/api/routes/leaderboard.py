@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.database import get_db
+from app.models import Classroom, User
+from app.schemas.leaderboard import LeaderboardEntry, LeaderboardMe, LeaderboardResponse
+from app.services.leaderboard import GLOBAL, leaderboards
+from app.services.seed import calculate_level
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+
+def _leaderboard(db: Session, scope: int | str, current_user: User, limit: int) -> LeaderboardResponse:
+    total, top, my_rank, my_xp = leaderboards.standings(scope, current_user.id, limit)
+
+    # Rank and XP come from memory; only names and avatars of the top entries are read.
+    ids = [user_id for _, user_id, _ in top]
+    users = {
+        row.id: row
+        for row in db.query(User.id, User.firstName, User.lastName, User.avatar).filter(User.id.in_(ids))
+    } if ids else {}
+    entries = [
+        LeaderboardEntry(
+            rank=rank,
+            userId=user_id,
+            firstName=users[user_id].firstName,
+            lastName=users[user_id].lastName,
+            avatar=users[user_id].avatar,
+            totalXp=xp,
+            level=calculate_level(xp),
+        )
+        for rank, user_id, xp in top
+        if user_id in users
+    ]
+    me = LeaderboardMe(rank=my_rank, totalXp=my_xp, level=calculate_level(my_xp)) if my_rank else None
+    return LeaderboardResponse(scope=str(scope), total=total, entries=entries, me=me)
+
+
+@router.get("", response_model=LeaderboardResponse)
+def global_leaderboard(
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return _leaderboard(db, GLOBAL, current_user, limit)
+
+
+@router.get("/classes/{class_id}", response_model=LeaderboardResponse)
+def class_leaderboard(
+    class_id: int,
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role == "STUDENT":
+        if not leaderboards.is_member(current_user.id, class_id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enrolled in this class")
+    else:
+        classroom = db.get(Classroom, class_id)
+        if not classroom:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
+        if current_user.role == "PROF" and classroom.ownerId != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your class")
+    return _leaderboard(db, class_id, current_user, limit)
@@ -1,73 +1,183 @@
 ﻿from __future__ import annotations
 
-from datetime import datetime, timedelta
+import hashlib
+import math
+from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import TrainingSession, User, UserStats
-from app.schemas.progress import TrainingSessionResponse, UserStatsResponse, XpProgressResponse
+from app.models import User, UserStats
+from app.schemas.progress import (
+    ActivityHeatmapResponse,
+    DashboardResponse,
+    PrecisionTrendPoint,
+    PrecisionTrendResponse,
+    TrainingSessionResponse,
+    UserStatsResponse,
+    XpCurvePoint,
+    XpCurveResponse,
+    XpProgressResponse,
+)
+from app.services.activity import UnknownTimezone, activity_year, resolve_timezone
+from app.services.rollup import InvalidRange, precision_trend, rollup_today, xp_curve
+from app.services.sessions import InvalidCursor, session_page
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
 
-@router.get("/stats", response_model=UserStatsResponse)
-def get_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    stats = db.query(UserStats).filter(UserStats.userId == current_user.id).first()
+def _user_stats(db: Session, user_id: int) -> UserStats:
+    stats = db.query(UserStats).filter(UserStats.userId == user_id).first()
     if not stats:
-        stats = UserStats(userId=current_user.id)
+        stats = UserStats(userId=user_id)
         db.add(stats)
         db.commit()
         db.refresh(stats)
     return stats
 
 
+def _xp_progress(stats: UserStats) -> XpProgressResponse:
+    xp_per_level = 1000
+    current_level_xp = stats.totalXp % xp_per_level
+    progress = round((current_level_xp / xp_per_level) * 100)
+
+    return XpProgressResponse(
+        level=stats.level,
+        totalXp=stats.totalXp,
+        currentXp=current_level_xp,
+        xpForNextLevel=xp_per_level,
+        progress=progress,
+    )
+
+
+@router.get("/stats", response_model=UserStatsResponse)
+def get_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return _user_stats(db, current_user.id)
+
+
 @router.get("/sessions", response_model=list[TrainingSessionResponse])
 def get_sessions(
-    limit: int = Query(default=10),
+    response: Response,
+    limit: int = Query(default=10, ge=1),
+    cursor: str | None = Query(default=None),
+    difficulty: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    sessions = (
-        db.query(TrainingSession)
-        .filter(TrainingSession.userId == current_user.id)
-        .order_by(TrainingSession.completedAt.desc())
-        .limit(limit)
-        .all()
-    )
+    # The body stays a plain list; the next page is announced in X-Next-Cursor.
+    try:
+        sessions, next_cursor = session_page(
+            db,
+            current_user.id,
+            min(limit, settings.sessions_max_page_size),
+            cursor=cursor,
+            difficulty=difficulty,
+            since=since,
+            until=until,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return sessions
 
 
+def _activity_zone(tz: str | None):
+    try:
+        return resolve_timezone(tz)
+    except UnknownTimezone:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown timezone")
+
+
 @router.get("/weekly-activity")
 def weekly_activity(
+    tz: str | None = Query(default=None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    now = datetime.utcnow()
-    week_ago = now - timedelta(days=7)
-
-    sessions = (
-        db.query(TrainingSession)
-        .filter(TrainingSession.userId == current_user.id)
-        .filter(TrainingSession.completedAt >= week_ago)
-        .order_by(TrainingSession.completedAt.asc())
-        .all()
+    return activity_year(db, current_user.id, _activity_zone(tz)).weekly()
+
+
+@router.get("/activity-heatmap", response_model=ActivityHeatmapResponse)
+def activity_heatmap(
+    tz: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    year = activity_year(db, current_user.id, _activity_zone(tz))
+    return ActivityHeatmapResponse(
+        timezone=year.timezone,
+        start=year.start,
+        end=year.end,
+        counts=list(year.counts),
+        total=sum(year.counts),
+        activeDays=sum(1 for count in year.counts if count),
+        maxCount=max(year.counts),
     )
 
-    activity = {"Lun": 0, "Mar": 0, "Mer": 0, "Jeu": 0, "Ven": 0, "Sam": 0, "Dim": 0}
-    day_names = ["Dim", "Lun", "Mar", "Mer", "Jeu", "Ven", "Sam"]
 
-    for session in sessions:
-        node_index = (session.completedAt.weekday() + 1) % 7
-        day_name = day_names[node_index]
-        activity[day_name] += 1
+def _rollup_range(since: date | None, until: date | None) -> tuple[date, date]:
+    end = until or rollup_today()
+    return since or end - timedelta(days=89), end
 
-    return activity
+
+@router.get("/xp-curve", response_model=XpCurveResponse)
+def get_xp_curve(
+    since: date | None = Query(default=None),
+    until: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Served from user_daily_stats: cost grows with the number of days, not sessions.
+    start, end = _rollup_range(since, until)
+    try:
+        days, daily, total = xp_curve(db, current_user.id, start, end)
+    except InvalidRange as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return XpCurveResponse(
+        start=start,
+        end=end,
+        points=[
+            XpCurvePoint(date=day, xp=int(xp), totalXp=int(cumulative))
+            for day, xp, cumulative in zip(days, daily, total)
+        ],
+    )
+
+
+@router.get("/precision-trend", response_model=PrecisionTrendResponse)
+def get_precision_trend(
+    since: date | None = Query(default=None),
+    until: date | None = Query(default=None),
+    window: int = Query(default=7),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    start, end = _rollup_range(since, until)
+    try:
+        days, sessions, average = precision_trend(db, current_user.id, start, end, window)
+    except InvalidRange as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return PrecisionTrendResponse(
+        start=start,
+        end=end,
+        window=window,
+        points=[
+            PrecisionTrendPoint(
+                date=day,
+                sessions=int(count),
+                precision=None if math.isnan(value) else round(float(value), 2),
+            )
+            for day, count, value in zip(days, sessions, average)
+        ],
+    )
 
 
 @router.get("/xp-progress", response_model=XpProgressResponse)
@@ -84,15 +194,33 @@ def xp_progress(
             progress=0,
             totalXp=None,
         )
+    return _xp_progress(stats)
 
-    xp_per_level = 1000
-    current_level_xp = stats.totalXp % xp_per_level
-    progress = round((current_level_xp / xp_per_level) * 100)
 
-    return XpProgressResponse(
-        level=stats.level,
-        totalXp=stats.totalXp,
-        currentXp=current_level_xp,
-        xpForNextLevel=xp_per_level,
-        progress=progress,
+@router.get("/dashboard", response_model=DashboardResponse)
+def dashboard(
+    request: Request,
+    limit: int = Query(default=6, ge=1, le=50),
+    tz: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Everything the progress page shows in one round trip: one UserStats read shared by
+    # the stats and XP cards, one sessions query, and the cached activity year.
+    zone = _activity_zone(tz)
+    stats = _user_stats(db, current_user.id)
+    payload = DashboardResponse(
+        stats=UserStatsResponse.model_validate(stats),
+        sessions=[TrainingSessionResponse.model_validate(s) for s in session_page(db, current_user.id, limit)[0]],
+        weeklyActivity=activity_year(db, current_user.id, zone).weekly(),
+        xpProgress=_xp_progress(stats),
     )
+
+    body = payload.model_dump_json().encode()
+    headers = {
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -3,10 +3,12 @@ from __future__ import annotations
 import secrets
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, require_prof_or_admin
+from app.core.config import settings
 from app.core.database import get_db
 from app.models import Classroom, Enrollment, Series, SeriesImage, SeriesProgress, User, TrainingSession, UserStats
 from app.schemas.series import (
@@ -18,6 +20,22 @@ from app.schemas.series import (
     SubmitSeriesResultRequest,
 )
 from app.schemas.classroom import JoinByCodeRequest
+from app.schemas.analytics import SeriesAnalyticsResponse
+from app.services.activity import invalidate_activity
+from app.services.analytics import invalidate_analytics, series_analytics
+from app.services.bundle import (
+    BUNDLE_FORMATS,
+    BUNDLE_VARIANTS,
+    BundleImage,
+    iter_multipart_bundle,
+    iter_zip_bundle,
+    multipart_boundary,
+    series_version,
+)
+from app.services.chat import invalidate_chat_context
+from app.services.dicom import DicomImportError, import_dicom_series
+from app.services.leaderboard import leaderboards
+from app.services.rollup import record_session
 
 router = APIRouter(prefix="/series", tags=["series"])
 
@@ -76,11 +94,66 @@ def create_series(
     )
 
 
+@router.post("/import-dicom", response_model=SeriesResponse, status_code=status.HTTP_201_CREATED)
+def import_dicom(
+    archive: UploadFile = File(...),
+    title: str = Form(...),
+    classroomId: int = Form(...),
+    description: str | None = Form(default=None),
+    difficulty: str = Form(default="MEDIUM"),
+    preset: str = Form(default="auto"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_prof_or_admin),
+):
+    if difficulty not in {"EASY", "MEDIUM", "HARD"}:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid difficulty")
+
+    classroom = db.get(Classroom, classroomId)
+    if not classroom:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Classroom not found")
+    if classroom.ownerId != current_user.id and current_user.role != "ADMIN":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your class")
+
+    if archive.size is not None and archive.size > settings.max_dicom_upload_mb * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Archive trop volumineuse (max {settings.max_dicom_upload_mb}MB).",
+        )
+
+    try:
+        series, image_count = import_dicom_series(
+            db,
+            archive=archive.file,
+            title=title,
+            description=description,
+            difficulty=difficulty,
+            classroom_id=classroom.id,
+            created_by_id=current_user.id,
+            code=_generate_code(),
+            preset=preset,
+        )
+    except DicomImportError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    finally:
+        archive.file.close()
+
+    return SeriesResponse(
+        id=series.id,
+        title=series.title,
+        description=series.description,
+        difficulty=series.difficulty,
+        code=series.code,
+        classroomId=series.classroomId,
+        createdById=series.createdById,
+        createdAt=series.createdAt,
+        imageCount=image_count,
+    )
 
 
 
 @router.get("/training/random", response_model=SeriesDetailResponse)
 def get_random_training_series(
+    response: Response,
     difficulty: str | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -98,12 +171,13 @@ def get_random_training_series(
         
     chosen_id = random.choice(all_ids)
     
-    return get_series_detail(chosen_id, db, current_user)
+    return get_series_detail(chosen_id, response, db, current_user)
 
 
 @router.get("/{series_id}", response_model=SeriesDetailResponse)
 def get_series_detail(
     series_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -116,6 +190,11 @@ def get_series_detail(
         for img in series.images
     ]
 
+    # Let the browser start fetching the first slices while it is still parsing this payload.
+    preload = [img.imageUrl for img in images[: settings.series_preload_images]]
+    if preload:
+        response.headers["Link"] = ", ".join(f"<{url}>; rel=preload; as=image" for url in preload)
+
     progress = (
         db.query(SeriesProgress)
         .filter(SeriesProgress.userId == current_user.id, SeriesProgress.seriesId == series_id)
@@ -132,12 +211,61 @@ def get_series_detail(
         createdById=series.createdById,
         createdAt=series.createdAt,
         images=images,
+        version=series_version(BundleImage(img.id, img.orderIndex, img.imageUrl) for img in images),
         status=progress.status if progress else None,
         score=progress.score if progress else None,
         precision=progress.precision if progress else None,
     )
 
 
+@router.get("/{series_id}/bundle")
+def get_series_bundle(
+    series_id: int,
+    request: Request,
+    format: str = Query(default="zip"),
+    variant: str = Query(default="full"),
+    start: int = Query(default=0, ge=0),
+    v: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if format not in BUNDLE_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid format")
+    if variant not in BUNDLE_VARIANTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid variant")
+
+    series = db.get(Series, series_id)
+    if not series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Series not found")
+
+    # Plain tuples: the DB session is closed before the body is streamed.
+    images = [BundleImage(img.id, img.orderIndex, img.imageUrl) for img in series.images]
+    version = series_version(images)
+    headers = {
+        "ETag": f'"{version}-{variant}-{format}-{start}"',
+        "X-Series-Version": version,
+        # A URL pinned to the current version (?v=) can never change content.
+        "Cache-Control": "private, max-age=31536000, immutable" if v == version else "private, no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if format == "zip":
+        headers["Content-Disposition"] = f'attachment; filename="series-{series_id}-{variant}.zip"'
+        return StreamingResponse(
+            iter_zip_bundle(images, version, variant, start),
+            media_type="application/zip",
+            headers=headers,
+        )
+
+    boundary = multipart_boundary()
+    return StreamingResponse(
+        iter_multipart_bundle(images, version, variant, start, boundary),
+        media_type=f"multipart/mixed; boundary={boundary}",
+        headers=headers,
+    )
+
+
 @router.delete("/{series_id}")
 def delete_series(
     series_id: int,
@@ -154,6 +282,7 @@ def delete_series(
 
     db.delete(series)
     db.commit()
+    invalidate_analytics(series.classroomId, [series_id])
     return {"message": "Series deleted"}
 
 
@@ -171,29 +300,55 @@ def get_series_progress(
     if not classroom:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Classroom not found")
 
-    # Get all students enrolled in the classroom
-    enrollments = db.query(Enrollment).filter(Enrollment.classroomId == classroom.id).all()
-
-    results = []
-    for enrollment in enrollments:
-        student = enrollment.user
-        progress = (
-            db.query(SeriesProgress)
-            .filter(SeriesProgress.userId == student.id, SeriesProgress.seriesId == series_id)
-            .first()
+    # Every enrolled student with their progress on this series, in one query.
+    rows = (
+        db.query(
+            User.id,
+            User.firstName,
+            User.lastName,
+            SeriesProgress.status,
+            SeriesProgress.precision,
+            SeriesProgress.score,
+            SeriesProgress.completedAt,
         )
-        results.append(
-            StudentSeriesProgressResponse(
-                studentId=student.id,
-                firstName=student.firstName,
-                lastName=student.lastName,
-                status=progress.status if progress else "NOT_STARTED",
-                precision=progress.precision if progress else None,
-                score=progress.score if progress else None,
-                completedAt=progress.completedAt if progress else None,
-            )
+        .select_from(Enrollment)
+        .join(User, User.id == Enrollment.userId)
+        .outerjoin(
+            SeriesProgress,
+            (SeriesProgress.userId == Enrollment.userId) & (SeriesProgress.seriesId == series_id),
         )
-    return results
+        .filter(Enrollment.classroomId == classroom.id)
+        .order_by(Enrollment.id)
+        .all()
+    )
+    return [
+        StudentSeriesProgressResponse(
+            studentId=row.id,
+            firstName=row.firstName,
+            lastName=row.lastName,
+            status=row.status or "NOT_STARTED",
+            precision=row.precision,
+            score=row.score,
+            completedAt=row.completedAt,
+        )
+        for row in rows
+    ]
+
+
+@router.get("/{series_id}/analytics", response_model=SeriesAnalyticsResponse)
+def get_series_analytics(
+    series_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_prof_or_admin),
+):
+    series = db.get(Series, series_id)
+    if not series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Series not found")
+    if current_user.role != "ADMIN":
+        owner_id = db.query(Classroom.ownerId).filter(Classroom.id == series.classroomId).scalar()
+        if owner_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your series")
+    return series_analytics(db, series)
 
 
 # ── Student ──────────────────────────────────────────────────
@@ -299,6 +454,7 @@ def submit_series_result(
         completedAt=datetime.utcnow(),
     )
     db.add(session)
+    record_session(db, session)
 
     # 2. Update User Aggregated Stats
     stats = db.query(UserStats).filter(UserStats.userId == current_user.id).first()
@@ -315,6 +471,10 @@ def submit_series_result(
     stats.lastActivityAt = datetime.utcnow()
 
     db.commit()
+    invalidate_chat_context(current_user.id)
+    invalidate_activity(current_user.id)
+    leaderboards.set_xp(current_user.id, stats.totalXp)
+    invalidate_analytics(series.classroomId, [series_id])
     return {"message": "Results submitted", "seriesId": series_id}
 
 
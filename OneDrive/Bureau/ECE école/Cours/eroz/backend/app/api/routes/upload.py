@@ -1,86 +1,329 @@
 ﻿from __future__ import annotations
 
+import hashlib
 import os
-import time
-from pathlib import Path
+import re
+from dataclasses import asdict
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy.orm import Session
+import anyio
+import jwt
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParser, parse_options_header
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_released, require_prof_or_admin_released
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import SessionLocal
 from app.models import User
+from app.schemas.upload import CompleteUploadRequest, PresignRequest, PresignResponse, PresignedUploadResponse
+from app.services.blobstore import BLOB_URL_RE, blob_key, commit_staged
+from app.services.storage import LocalStorage, decode_direct_upload_token, get_storage, staging_file
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
-ALLOWED_MIME = {"image/jpeg", "image/png", "image/gif", "image/webp"}
-ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+MIME_EXT = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+UPLOAD_PURPOSES = {"avatar", "image"}
+# Room for the multipart boundary and part headers around the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+SNIFF_BYTES = 12
 
 
-@router.post("/avatar")
-def upload_avatar(
-    avatar: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    if avatar.content_type not in ALLOWED_MIME:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Format de fichier non supporte. Utilisez JPG, PNG, GIF ou WEBP.",
-        )
-
-    ext = Path(avatar.filename or "").suffix.lower()
-    if ext not in ALLOWED_EXT:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Format de fichier non supporte. Utilisez JPG, PNG, GIF ou WEBP.",
-        )
-
-    base_dir = Path(__file__).resolve().parents[3]
-    upload_dir = Path(settings.upload_dir)
-    if not upload_dir.is_absolute():
-        upload_dir = base_dir / upload_dir
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    filename = f"user-{current_user.id}-{int(time.time() * 1000)}{ext}"
-    file_path = upload_dir / filename
+def sniff_image_ext(head: bytes) -> str | None:
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Fichier trop volumineux (max {settings.max_upload_mb}MB).",
+    )
+
+
+def _unsupported_format() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Format de fichier non supporte. Utilisez JPG, PNG, GIF ou WEBP.",
+    )
+
+
+def _file_form(field: str) -> dict:
+    # The body is parsed by hand, so describe the form for the OpenAPI docs explicitly.
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {field: {"type": "string", "format": "binary"}},
+                        "required": [field],
+                    }
+                }
+            },
+        }
+    }
+
+
+async def _iter_form_file(request: Request, field: str) -> AsyncIterator[bytes]:
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="multipart/form-data expected")
+
+    wanted = field.encode()
+    pending: list[bytes] = []
+    part = {"field": b"", "value": b"", "headers": {}, "match": False, "done": False}
+
+    def on_part_begin():
+        part.update(field=b"", value=b"", headers={}, match=False)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
 
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part.update(field=b"", value=b"")
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["match"] = options.get(b"name") == wanted and b"filename" in options
+
+    def on_part_data(data, start, end):
+        if part["match"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        if part["match"]:
+            part["done"] = True
+            part["match"] = False
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    async for body in request.stream():
+        parser.write(body)
+        for chunk in pending:
+            yield chunk
+        pending.clear()
+        if part["done"]:
+            # Anything after our part is ignored; no need to keep reading the socket.
+            return
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Champ '{field}' manquant")
+
+
+async def _store_streamed_image(request: Request, field: str) -> str:
     max_size = settings.max_upload_mb * 1024 * 1024
-    size = 0
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > max_size + MULTIPART_OVERHEAD:
+        # Reject before reading a single byte of the body.
+        raise _too_large()
 
+    fd, tmp_path = staging_file()
+    os.close(fd)
     try:
-        with file_path.open("wb") as buffer:
-            while True:
-                chunk = avatar.file.read(1024 * 1024)
-                if not chunk:
-                    break
+        hasher = hashlib.sha256()
+        size = 0
+        head = b""
+        ext = None
+        async with await anyio.open_file(tmp_path, "wb") as buffer:
+            async for chunk in _iter_form_file(request, field):
                 size += len(chunk)
                 if size > max_size:
-                    buffer.close()
-                    file_path.unlink(missing_ok=True)
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Fichier trop volumineux (max 5MB).",
-                    )
-                buffer.write(chunk)
-    finally:
-        avatar.file.close()
+                    raise _too_large()
+                # The first bytes decide the type; content_type and filename are client claims.
+                if ext is None:
+                    head += chunk[: SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES:
+                        ext = sniff_image_ext(head)
+                        if ext is None:
+                            raise _unsupported_format()
+                hasher.update(chunk)
+                await buffer.write(chunk)
+
+        if ext is None:
+            ext = sniff_image_ext(head)
+            if ext is None:
+                raise _unsupported_format()
+        await anyio.to_thread.run_sync(commit_staged, tmp_path, hasher.hexdigest(), ext)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return get_storage().url(blob_key(hasher.hexdigest(), ext))
+
 
-    avatar_url = f"/uploads/{filename}"
-    current_user.avatar = avatar_url
-    db.commit()
-    db.refresh(current_user)
+def _set_avatar(user_id: int, avatar_url: str) -> dict:
+    # Own short session, opened once the bytes are stored: no pooled connection is held
+    # while the client uploads.
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        # Legacy avatars were written once per upload and never shared, so they can go right away.
+        # Content-addressed ones may be shared and are left to the uploads GC.
+        previous = user.avatar
+        if previous and previous.startswith(f"/uploads/user-{user.id}-") and previous != avatar_url:
+            (settings.upload_path / previous.removeprefix("/uploads/")).unlink(missing_ok=True)
+
+        user.avatar = avatar_url
+        db.commit()
+        db.refresh(user)
+    finally:
+        db.close()
 
     return {
         "message": "Avatar mis a jour avec succes",
         "avatar": avatar_url,
         "user": {
-            "id": current_user.id,
-            "firstName": current_user.firstName,
-            "lastName": current_user.lastName,
-            "email": current_user.email,
-            "role": current_user.role,
-            "avatar": current_user.avatar,
+            "id": user.id,
+            "firstName": user.firstName,
+            "lastName": user.lastName,
+            "email": user.email,
+            "role": user.role,
+            "avatar": user.avatar,
         },
     }
+
+
+def _check_purpose(purpose: str, user: User) -> None:
+    if purpose not in UPLOAD_PURPOSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid upload purpose")
+    if purpose == "image" and user.role not in {"PROF", "ADMIN"}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Requires PROF or ADMIN role")
+
+
+@router.post("/avatar", openapi_extra=_file_form("avatar"))
+async def upload_avatar(
+    request: Request,
+    current_user: User = Depends(get_current_user_released),
+):
+    avatar_url = await _store_streamed_image(request, "avatar")
+    return await run_in_threadpool(_set_avatar, current_user.id, avatar_url)
+
+
+@router.post("/image", openapi_extra=_file_form("image"))
+async def upload_image(
+    request: Request,
+    _: User = Depends(require_prof_or_admin_released),
+):
+    return {"url": await _store_streamed_image(request, "image")}
+
+
+# ── Direct uploads ───────────────────────────────────────────
+# The client hashes the file, asks for a presigned PUT, sends the bytes straight to
+# the store, then calls /complete so the API can check the object and record it.
+
+
+@router.post("/presign", response_model=PresignResponse)
+def presign_upload(
+    payload: PresignRequest,
+    current_user: User = Depends(get_current_user),
+):
+    _check_purpose(payload.purpose, current_user)
+
+    ext = MIME_EXT.get(payload.contentType)
+    if not ext:
+        raise _unsupported_format()
+    if payload.size <= 0 or payload.size > settings.max_upload_mb * 1024 * 1024:
+        raise _too_large()
+    sha256 = payload.sha256.lower()
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sha256")
+
+    storage = get_storage()
+    key = blob_key(sha256, ext)
+    if storage.exists(key):
+        # Already stored by someone: nothing to send, just /complete.
+        storage.touch(key)
+        return PresignResponse(key=key, url=storage.url(key))
+
+    upload = storage.presign_put(key, content_type=payload.contentType, size=payload.size, sha256=sha256)
+    return PresignResponse(key=key, url=storage.url(key), upload=PresignedUploadResponse(**asdict(upload)))
+
+
+@router.put("/direct/{token}")
+async def direct_upload(token: str, request: Request):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    try:
+        claims = decode_direct_upload_token(token)
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired upload URL")
+
+    expected_size = claims["size"]
+    declared = request.headers.get("content-length")
+    if declared is not None and not declared.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Content-Length")
+    if declared is not None and int(declared) != expected_size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Size mismatch")
+
+    fd, tmp_path = staging_file()
+    os.close(fd)
+    try:
+        hasher = hashlib.sha256()
+        size = 0
+        async with await anyio.open_file(tmp_path, "wb") as buffer:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > expected_size:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Size mismatch")
+                hasher.update(chunk)
+                await buffer.write(chunk)
+        if size != expected_size or hasher.hexdigest() != claims["sha256"]:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Checksum mismatch")
+        await anyio.to_thread.run_sync(storage.put_file, tmp_path, claims["key"], claims["ct"])
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return Response(status_code=status.HTTP_200_OK)
+
+
+@router.post("/complete")
+def complete_upload(
+    payload: CompleteUploadRequest,
+    current_user: User = Depends(get_current_user_released),
+):
+    _check_purpose(payload.purpose, current_user)
+
+    match = BLOB_URL_RE.fullmatch(payload.key)
+    if not match or not payload.key.startswith("blobs/"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid upload key")
+
+    storage = get_storage()
+    stored = storage.stat(payload.key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+    # Never trust the client: the object must really be an image of the announced type.
+    # A rejected key is left in place: it may be a blob someone else references (a
+    # thumbnail, a larger series image), and an orphan one is reclaimed by the uploads GC.
+    too_large = stored.size > settings.max_upload_mb * 1024 * 1024
+    if too_large or sniff_image_ext(storage.read_head(payload.key, 16)) != match.group("ext"):
+        raise _unsupported_format()
+
+    url = storage.url(payload.key)
+    if payload.purpose == "avatar":
+        return _set_avatar(current_user.id, url)
+    return {"url": url}
@@ -1,34 +1,48 @@
 ﻿from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import require_admin
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import User
+from app.models import Enrollment, User, UserStats
 from app.schemas.user import UpdateRoleRequest, UserAdminResponse
+from app.services.activity import invalidate_activity
+from app.services.chat import invalidate_chat_context
+from app.services.leaderboard import leaderboards
+from app.services.sessions import InvalidCursor
+from app.services.user_search import ROLES, count_users, user_page
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/", response_model=list[UserAdminResponse])
 def list_users(
+    response: Response,
     search: str | None = Query(default=None),
+    role: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1),
+    cursor: str | None = Query(default=None),
     db: Session = Depends(get_db),
     _: User = Depends(require_admin),
 ):
-    query = db.query(User)
-    if search:
-        like = f"%{search}%"
-        query = query.filter(
-            or_(
-                User.firstName.ilike(like),
-                User.lastName.ilike(like),
-                User.email.ilike(like),
-            )
+    # A plain list as before; the next page is announced in X-Next-Cursor and the
+    # (possibly estimated) number of matches in X-Total-Count.
+    if role and role not in ROLES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role")
+    try:
+        users, next_cursor = user_page(
+            db, min(limit, settings.users_max_page_size), search=search, role=role, cursor=cursor
         )
-    users = query.order_by(User.createdAt.desc()).all()
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if not cursor:
+        total, estimated = count_users(db, search=search, role=role)
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Count-Estimated"] = "true" if estimated else "false"
     return users
 
 
@@ -49,6 +63,15 @@ def update_role(
     user.role = payload.role
     db.commit()
     db.refresh(user)
+    invalidate_chat_context(user.id)
+    if user.role == "STUDENT":
+        stats = db.query(UserStats).filter(UserStats.userId == user.id).first()
+        classroom_ids = [
+            row.classroomId for row in db.query(Enrollment.classroomId).filter(Enrollment.userId == user.id)
+        ]
+        leaderboards.add_student(user.id, stats.totalXp if stats else 0, classroom_ids)
+    else:
+        leaderboards.remove_user(user.id)
     return user
 
 
@@ -64,4 +87,7 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_chat_context(user_id)
+    invalidate_activity(user_id)
+    leaderboards.remove_user(user_id)
     return {"message": "User deleted"}
@@ -0,0 +1,54 @@
+"""Move training sessions older than the retention period out of training_sessions.
+
+Usage (from backend/):
+    python -m app.commands.archive_sessions --months 24 --dry-run   # drop --dry-run to move
+    python -m app.commands.archive_sessions --months 24 --csv-dir /backups/sessions
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.archive import archive_sessions, retention_cutoff
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=settings.sessions_retention_months,
+        help="whole months kept in training_sessions (default SESSIONS_RETENTION_MONTHS)",
+    )
+    parser.add_argument(
+        "--csv-dir",
+        default=None,
+        help="write one gzipped CSV per month here instead of the archive table",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be moved")
+    args = parser.parse_args()
+
+    if args.months < 1:
+        parser.error("set --months or SESSIONS_RETENTION_MONTHS to at least 1")
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+
+    db = SessionLocal()
+    try:
+        archived = archive_sessions(db, args.months, csv_dir=args.csv_dir, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    for month, rows in archived:
+        print(f"month={month:%Y-%m} rows={rows}")
+    target = args.csv_dir or "training_sessions_archive"
+    print(
+        f"archived={sum(rows for _, rows in archived)} months={len(archived)} "
+        f"before={retention_cutoff(args.months)} target={target} dry_run={args.dry_run}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Rebuild the user_daily_stats rollup from training_sessions.
+
+Usage (from backend/):
+    python -m app.commands.backfill_daily_stats [--user-id 42]
+"""
+from __future__ import annotations
+
+import argparse
+
+from app.core.database import Base, SessionLocal, engine
+from app.models import UserDailyStats
+from app.services.rollup import rebuild_daily_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user's rows")
+    args = parser.parse_args()
+
+    # The table may predate the API's first start on this database.
+    Base.metadata.create_all(bind=engine, tables=[UserDailyStats.__table__])
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_stats(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"rows={rows} daily rollup rows written for {scope}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Remove content-addressed uploads that no row references anymore.
+
+Usage (from backend/):
+    python -m app.commands.gc_uploads [--dry-run] [--batch-size 500] [--grace-hours 1]
+"""
+from __future__ import annotations
+
+import argparse
+
+from app.core.database import SessionLocal
+from app.services.blobstore import collect_garbage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--grace-hours", type=float, default=1.0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = collect_garbage(
+            db,
+            batch_size=args.batch_size,
+            grace_seconds=int(args.grace_hours * 3600),
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+
+    action = "would delete" if args.dry_run else "deleted"
+    print(
+        f"scanned={report.scanned} referenced={report.referenced} skipped_recent={report.skipped} "
+        f"{action}={report.deleted} ({report.freed_bytes / 1e6:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Create the upcoming monthly partitions of training_sessions (PostgreSQL only).
+
+Usage (from backend/):
+    python -m app.commands.partition_sessions            # run monthly, e.g. from cron
+    python -m app.commands.partition_sessions --convert  # migrate an unpartitioned table
+"""
+from __future__ import annotations
+
+import argparse
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.partitions import convert_to_partitioned, ensure_partitions, is_partitioned, partition_name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--convert",
+        action="store_true",
+        help="rebuild an existing unpartitioned table as a partitioned one (locks it while copying)",
+    )
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        parser.error("training_sessions is only partitioned on PostgreSQL")
+    if args.convert and not settings.sessions_partitioning:
+        parser.error("partitioning is off; set SESSIONS_PARTITIONING=true before converting")
+
+    copied = 0
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            if not args.convert:
+                parser.error("training_sessions is not partitioned yet; rerun with --convert")
+            copied = convert_to_partitioned(conn)
+        created = ensure_partitions(conn)
+
+    names = ",".join(partition_name(month) for month in created) or "-"
+    print(f"copied={copied} created={len(created)} partitions={names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Delete chat conversations idle for longer than the retention period.
+
+Usage (from backend/):
+    python -m app.commands.purge_conversations [--days 30]
+"""
+from __future__ import annotations
+
+import argparse
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.conversations import purge_expired_conversations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=settings.chat_conversation_ttl_days)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = purge_expired_conversations(db, args.days)
+    finally:
+        db.close()
+
+    print(f"deleted={deleted} conversations idle for more than {args.days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Recompute every user's stats (XP, level, averages, streak) from training_sessions.
+
+Usage (from backend/):
+    python -m app.commands.rebuild_stats --dry-run   # drop --dry-run to write
+    python -m app.commands.rebuild_stats --chunk-size 100000 --user-id 42
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.core.database import SessionLocal
+from app.services.stats_rebuild import rebuild_all_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report the differences without writing")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="sessions fetched per round trip")
+    parser.add_argument("--batch-size", type=int, default=1000, help="user_stats rows written per statement")
+    parser.add_argument("--samples", type=int, default=20, help="changed users to print in the diff")
+    parser.add_argument("--user-id", type=int, action="append", help="only rebuild these users (repeatable)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = rebuild_all_stats(
+            db,
+            chunk_size=args.chunk_size,
+            write_batch=args.batch_size,
+            dry_run=args.dry_run,
+            sample_size=args.samples,
+            user_ids=args.user_id,
+        )
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+    for user_id, changes in report.samples:
+        diff = " ".join(f"{name}={old!r}->{new!r}" for name, (old, new) in changes.items())
+        print(f"user={user_id} {diff}")
+    fields = ",".join(f"{name}:{count}" for name, count in report.fields.most_common()) or "-"
+    print(
+        f"sessions={report.sessions} users={report.users} changed={report.changed} "
+        f"inserted={report.inserted} reset={report.reset} fields={fields} "
+        f"elapsed={time.perf_counter() - started:.1f}s dry_run={args.dry_run}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 ﻿from __future__ import annotations
 
+from pathlib import Path
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -14,10 +16,67 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
     access_token_expires_days: int = Field(30, alias="ACCESS_TOKEN_EXPIRES_DAYS")
     groq_api_key: str | None = Field(None, alias="GROQ_API_KEY")
+    groq_base_url: str | None = Field(None, alias="GROQ_BASE_URL")
+    groq_model: str = Field("llama-3.1-8b-instant", alias="GROQ_MODEL")
+    groq_timeout_seconds: float = Field(30.0, alias="GROQ_TIMEOUT_SECONDS")
+    groq_connect_timeout_seconds: float = Field(5.0, alias="GROQ_CONNECT_TIMEOUT_SECONDS")
+    groq_max_retries: int = Field(2, alias="GROQ_MAX_RETRIES")
+    groq_max_connections: int = Field(20, alias="GROQ_MAX_CONNECTIONS")
+    chat_max_concurrency: int = Field(16, alias="CHAT_MAX_CONCURRENCY")
+    chat_max_queue: int = Field(64, alias="CHAT_MAX_QUEUE")
+    chat_queue_timeout_seconds: float = Field(10.0, alias="CHAT_QUEUE_TIMEOUT_SECONDS")
+    chat_breaker_failures: int = Field(5, alias="CHAT_BREAKER_FAILURES")
+    chat_breaker_cooldown_seconds: float = Field(30.0, alias="CHAT_BREAKER_COOLDOWN_SECONDS")
+    chat_context_cache_size: int = Field(4096, alias="CHAT_CONTEXT_CACHE_SIZE")
+    chat_context_cache_ttl_seconds: int = Field(3600, alias="CHAT_CONTEXT_CACHE_TTL_SECONDS")
+    chat_cache_max_entries: int = Field(1024, alias="CHAT_CACHE_MAX_ENTRIES")
+    chat_cache_ttl_seconds: int = Field(3600, alias="CHAT_CACHE_TTL_SECONDS")
+    chat_history_token_budget: int = Field(1500, alias="CHAT_HISTORY_TOKEN_BUDGET")
+    chat_summary_enabled: bool = Field(True, alias="CHAT_SUMMARY_ENABLED")
+    chat_summary_min_tokens: int = Field(300, alias="CHAT_SUMMARY_MIN_TOKENS")
+    chat_summary_ttl_days: int = Field(30, alias="CHAT_SUMMARY_TTL_DAYS")
+    chat_conversation_ttl_days: int = Field(30, alias="CHAT_CONVERSATION_TTL_DAYS")
+    chat_conversation_cache_size: int = Field(2048, alias="CHAT_CONVERSATION_CACHE_SIZE")
+    chat_conversation_cache_ttl_seconds: int = Field(1800, alias="CHAT_CONVERSATION_CACHE_TTL_SECONDS")
+    chat_max_message_chars: int = Field(4000, alias="CHAT_MAX_MESSAGE_CHARS")
+    faq_answer_threshold: float = Field(0.75, alias="FAQ_ANSWER_THRESHOLD")
+    faq_snippet_threshold: float = Field(0.3, alias="FAQ_SNIPPET_THRESHOLD")
+    sessions_max_page_size: int = Field(100, alias="SESSIONS_MAX_PAGE_SIZE")
+    users_max_page_size: int = Field(100, alias="USERS_MAX_PAGE_SIZE")
+    users_exact_count_below: int = Field(10000, alias="USERS_EXACT_COUNT_BELOW")
+    sessions_history_months: int = Field(12, alias="SESSIONS_HISTORY_MONTHS")
+    sessions_partitioning: bool = Field(False, alias="SESSIONS_PARTITIONING")
+    sessions_partitions_ahead: int = Field(3, alias="SESSIONS_PARTITIONS_AHEAD")
+    sessions_retention_months: int = Field(0, alias="SESSIONS_RETENTION_MONTHS")
+    activity_timezone: str = Field("Europe/Paris", alias="ACTIVITY_TIMEZONE")
+    activity_cache_size: int = Field(4096, alias="ACTIVITY_CACHE_SIZE")
+    activity_cache_ttl_seconds: int = Field(3600, alias="ACTIVITY_CACHE_TTL_SECONDS")
+    analytics_cache_size: int = Field(1024, alias="ANALYTICS_CACHE_SIZE")
+    analytics_cache_ttl_seconds: int = Field(300, alias="ANALYTICS_CACHE_TTL_SECONDS")
+    export_chunk_size: int = Field(2000, alias="EXPORT_CHUNK_SIZE")
     upload_dir: str = Field("uploads", alias="UPLOAD_DIR")
     max_upload_mb: int = Field(5, alias="MAX_UPLOAD_MB")
+    max_dicom_upload_mb: int = Field(1024, alias="MAX_DICOM_UPLOAD_MB")
+    dicom_workers: int = Field(0, alias="DICOM_WORKERS")
+    uploads_server_mode: str = Field("optimized", alias="UPLOADS_SERVER_MODE")
+    series_preload_images: int = Field(3, alias="SERIES_PRELOAD_IMAGES")
+    storage_backend: str = Field("local", alias="STORAGE_BACKEND")
+    s3_endpoint_url: str | None = Field(None, alias="S3_ENDPOINT_URL")
+    s3_public_url: str | None = Field(None, alias="S3_PUBLIC_URL")
+    s3_bucket: str | None = Field(None, alias="S3_BUCKET")
+    s3_region: str = Field("us-east-1", alias="S3_REGION")
+    s3_access_key: str | None = Field(None, alias="S3_ACCESS_KEY")
+    s3_secret_key: str | None = Field(None, alias="S3_SECRET_KEY")
+    presign_expires_seconds: int = Field(300, alias="PRESIGN_EXPIRES_SECONDS")
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore", populate_by_name=True)
 
+    @property
+    def upload_path(self) -> Path:
+        path = Path(self.upload_dir)
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parents[2] / path
+        return path
+
 
 settings = Settings()
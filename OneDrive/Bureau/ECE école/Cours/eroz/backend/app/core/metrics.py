@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+
+
+class Distribution:
+    """Running count/mean/max plus percentiles over the last `window` samples."""
+
+    def __init__(self, window: int = 1000):
+        self._recent: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        with self._lock:
+            self._recent.append(value)
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2),
+            "p50": recent[len(recent) // 2],
+            "p95": recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+            "max": self.max,
+        }
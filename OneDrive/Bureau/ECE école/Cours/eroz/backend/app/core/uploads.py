@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Receive, Scope, Send
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "public, no-cache"
+
+BLOB_PATH_RE = re.compile(r"(?:^|/)blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<name>[0-9a-f]{64}(?:\.[a-z0-9]+)*)$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Served in preference order when a sibling file with the suffix exists.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    # Single ranges only; multi-range requests fall back to the full body, which RFC 9110 allows.
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start_s, end_s = match.groups()
+    if not start_s and not end_s:
+        return None
+    if not start_s:
+        length = int(end_s)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = min(int(end_s), size - 1) if end_s else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class UploadFileResponse(FileResponse):
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        *,
+        headers: dict[str, str],
+        media_type: str | None = None,
+        byte_range: tuple[int, int] | None = None,
+    ) -> None:
+        super().__init__(
+            path,
+            status_code=206 if byte_range else 200,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        self.size = stat_result.st_size
+        self.byte_range = byte_range
+        if byte_range:
+            start, end = byte_range
+            self.headers["content-length"] = str(end - start + 1)
+            self.headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        offset, end = self.byte_range or (0, self.size - 1)
+        count = end - offset + 1
+        extensions = scope.get("extensions") or {}
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in extensions:
+            # Let the server hand the descriptor to sendfile(2); no bytes cross Python.
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
+        elif "http.response.pathsend" in extensions and self.byte_range is None:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                if offset:
+                    await file.seek(offset)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+# StaticFiles for user uploads: immutable caching for content-addressed blobs,
+# single byte ranges, precompressed siblings and zero-copy send when the server offers it.
+class UploadsStaticFiles(StaticFiles):
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        # Staging files (.tmp/) are never public.
+        if any(part.startswith(".") for part in path.split(os.sep)):
+            return "", None
+        return super().lookup_path(path)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+        blob = BLOB_PATH_RE.search(full_path.replace(os.sep, "/"))
+
+        headers = {
+            "accept-ranges": "bytes",
+            "cache-control": IMMUTABLE_CACHE if blob else REVALIDATE_CACHE,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "vary": "Accept-Encoding",
+        }
+        if blob:
+            # The digest is the content, so it is a strong validator by construction.
+            headers["etag"] = f'"{blob.group("name")}"'
+        else:
+            headers["etag"] = f'"{int(stat_result.st_mtime_ns):x}-{stat_result.st_size:x}"'
+
+        media_type = None
+        serve_path, serve_stat = full_path, stat_result
+        range_header = request_headers.get("range")
+        if range_header is None:
+            accepted = request_headers.get("accept-encoding", "")
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding not in accepted:
+                    continue
+                try:
+                    candidate = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                serve_path, serve_stat = full_path + suffix, candidate
+                media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+                headers["content-encoding"] = encoding
+                headers["etag"] = headers["etag"][:-1] + f'-{encoding}"'
+                break
+
+        if self.is_not_modified(Headers(headers), request_headers):
+            return NotModifiedResponse(Headers(headers))
+
+        byte_range = None
+        if range_header is not None:
+            if_range = request_headers.get("if-range")
+            if if_range is None or if_range == headers["etag"]:
+                try:
+                    byte_range = parse_range(range_header, stat_result.st_size)
+                except RangeNotSatisfiable:
+                    return Response(
+                        status_code=416,
+                        headers={"content-range": f"bytes */{stat_result.st_size}", **headers},
+                    )
+
+        return UploadFileResponse(
+            serve_path,
+            serve_stat,
+            headers=headers,
+            media_type=media_type,
+            byte_range=byte_range,
+        )
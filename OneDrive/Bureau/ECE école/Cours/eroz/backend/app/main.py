@@ -1,7 +1,6 @@
 ﻿from __future__ import annotations
 
 import time
-from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,7 +11,13 @@ from sqlalchemy import text
 from app.api.router import api_router
 from app.core.config import settings
 from app.core.database import Base, SessionLocal, engine
+from app.core.uploads import UploadsStaticFiles
+from app.services.dicom import shutdown_dicom_pool
+from app.services.leaderboard import leaderboards
+from app.services.llm import close_llm_client
+from app.services.partitions import maintain_partitions, prepare_partitioned_table
 from app.services.seed import seed_if_needed
+from app.services.user_search import prepare_search
 import app.models  # noqa: F401
 
 app = FastAPI(title=settings.app_name)
@@ -23,6 +28,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated", "Content-Disposition"],
 )
 
 
@@ -38,12 +44,26 @@ def on_startup():
     else:
         raise RuntimeError("Database not ready")
 
+    prepare_partitioned_table(engine)
+    prepare_search(engine)
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so indexes added to them later are created here.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     db = SessionLocal()
     try:
         seed_if_needed(db)
+        leaderboards.rebuild(db)
     finally:
         db.close()
+    maintain_partitions(engine)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await close_llm_client()
+    shutdown_dicom_pool()
 
 
 @app.get("/", response_class=PlainTextResponse)
@@ -51,11 +71,9 @@ def root():
     return "API Eroz is running"
 
 
-base_dir = Path(__file__).resolve().parents[1]
-upload_dir = Path(settings.upload_dir)
-if not upload_dir.is_absolute():
-    upload_dir = base_dir / upload_dir
+upload_dir = settings.upload_path
 upload_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(upload_dir)), name="uploads")
+uploads_app = UploadsStaticFiles if settings.uploads_server_mode == "optimized" else StaticFiles
+app.mount("/uploads", uploads_app(directory=str(upload_dir)), name="uploads")
 
 app.include_router(api_router, prefix="/api")
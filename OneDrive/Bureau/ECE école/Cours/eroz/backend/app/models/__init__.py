@@ -1,16 +1,22 @@
 ﻿from app.models.user import User
-from app.models.training_session import TrainingSession
-from app.models.user_stats import UserStats
+from app.models.training_session import TrainingSession, TrainingSessionArchive
+from app.models.user_stats import UserDailyStats, UserStats
 from app.models.classroom import Classroom, Enrollment
 from app.models.series import Series, SeriesImage, SeriesProgress
+from app.models.chat import ChatConversation, ChatMessage, ChatSummary
 
 __all__ = [
     "User",
     "TrainingSession",
+    "TrainingSessionArchive",
     "UserStats",
+    "UserDailyStats",
     "Classroom",
     "Enrollment",
     "Series",
     "SeriesImage",
     "SeriesProgress",
+    "ChatConversation",
+    "ChatMessage",
+    "ChatSummary",
 ]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class ChatConversation(Base):
+    __tablename__ = "chat_conversations"
+
+    id = Column(String(32), primary_key=True)
+    userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    # Bumped with every stored turn; lets a worker notice its cached copy is stale.
+    messageCount = Column(Integer, default=0, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updatedAt = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+
+    messages = relationship(
+        "ChatMessage",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ChatMessage.id",
+    )
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+
+    id = Column(Integer, primary_key=True)
+    conversationId = Column(
+        String(32), ForeignKey("chat_conversations.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    role = Column(String(16), nullable=False)
+    content = Column(Text, nullable=False)
+
+
+class ChatSummary(Base):
+    __tablename__ = "chat_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    # Chained hash of the user id and every message the summary covers.
+    key = Column(String(64), unique=True, index=True, nullable=False)
+    coveredMessages = Column(Integer, nullable=False)
+    summary = Column(Text, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
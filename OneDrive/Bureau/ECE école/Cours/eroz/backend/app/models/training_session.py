@@ -2,14 +2,18 @@
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 
 class TrainingSession(Base):
+    # On PostgreSQL the table is range-partitioned by month on completedAt, and its
+    # physical primary key is (id, completedAt) (see app.services.partitions); id alone
+    # stays unique through the shared sequence and is what the ORM maps.
     __tablename__ = "training_sessions"
+    __table_args__ = (Index("ix_training_sessions_user_completed", "userId", "completedAt", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
@@ -25,3 +29,23 @@ class TrainingSession(Base):
     completedAt = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
 
     user = relationship("User", back_populates="sessions")
+
+
+class TrainingSessionArchive(Base):
+    # Sessions past the retention period, moved out of training_sessions a month at a
+    # time. Same columns and ids; a single index, as only rebuilds read it.
+    __tablename__ = "training_sessions_archive"
+    __table_args__ = (Index("ix_training_sessions_archive_user_completed", "userId", "completedAt"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    difficulty = Column(String, nullable=False)
+    precision = Column(Float, nullable=False)
+    duration = Column(Integer, nullable=False)
+    totalImages = Column(Integer, nullable=False)
+    correctAnswers = Column(Integer, nullable=False)
+    baseScore = Column(Integer, nullable=False)
+    multiplier = Column(Float, nullable=False)
+    xpEarned = Column(Integer, nullable=False)
+    completedAt = Column(DateTime, nullable=False)
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String, func, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -10,6 +10,11 @@ from app.core.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    # Keyset pages of the admin list, newest first, with and without a role filter.
+    __table_args__ = (
+        Index("ix_users_created", "createdAt", "id"),
+        Index("ix_users_role_created", "role", "createdAt", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -27,3 +32,21 @@ class User(Base):
     enrollments = relationship("Enrollment", back_populates="user", cascade="all, delete-orphan")
     created_series = relationship("Series", back_populates="created_by", cascade="all, delete-orphan")
     series_progress = relationship("SeriesProgress", back_populates="user", cascade="all, delete-orphan")
+
+
+# What the admin search matches against; queries must use this exact expression for
+# PostgreSQL to pick the trigram index below.
+USER_SEARCH_TEXT = func.lower(User.firstName + " " + User.lastName + " " + User.email)
+
+
+def _has_trigram(ddl, target, bind, **kw) -> bool:
+    # gin_trgm_ops comes from the pg_trgm extension, created at startup when the role may.
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+Index(
+    "ix_users_search_trgm",
+    USER_SEARCH_TEXT.label("search"),
+    postgresql_using="gin",
+    postgresql_ops={"search": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql", callable_=_has_trigram)
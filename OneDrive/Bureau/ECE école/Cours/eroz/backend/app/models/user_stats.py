@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -21,3 +21,19 @@ class UserStats(Base):
     lastActivityAt = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="stats")
+
+
+class UserDailyStats(Base):
+    # Per-user, per-day rollup of training_sessions (days in ACTIVITY_TIMEZONE), kept up to
+    # date in the submission transaction so charts over time never scan the sessions.
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (UniqueConstraint("userId", "day", name="uq_user_daily_stats_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    day = Column(Date, nullable=False)
+
+    sessions = Column(Integer, default=0, nullable=False)
+    xp = Column(Integer, default=0, nullable=False)
+    precisionSum = Column(Float, default=0, nullable=False)
+    durationSum = Column(Integer, default=0, nullable=False)
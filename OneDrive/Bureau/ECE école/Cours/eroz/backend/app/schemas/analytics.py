@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class DistributionStats(BaseModel):
+    count: int
+    mean: float
+    std: float
+    min: float
+    p10: float
+    p25: float
+    median: float
+    p75: float
+    p90: float
+    max: float
+
+
+class Histogram(BaseModel):
+    edges: list[float]
+    counts: list[int]
+
+
+class SeriesAnalyticsResponse(BaseModel):
+    seriesId: int
+    classroomId: int
+    students: int
+    completed: int
+    completionRate: float
+    precision: DistributionStats | None
+    precisionHistogram: Histogram
+    score: DistributionStats | None
+    scoreHistogram: Histogram
+    timeToComplete: DistributionStats | None
+
+
+class ClassSeriesSummary(BaseModel):
+    seriesId: int
+    title: str
+    completed: int
+    completionRate: float
+    meanPrecision: float | None
+
+
+class ClassAnalyticsResponse(BaseModel):
+    classroomId: int
+    students: int
+    series: int
+    completed: int
+    completionRate: float
+    precision: DistributionStats | None
+    precisionHistogram: Histogram
+    score: DistributionStats | None
+    scoreHistogram: Histogram
+    studentPrecision: DistributionStats | None
+    timeSpent: DistributionStats | None
+    timeSpentHistogram: Histogram
+    sessionsPerStudent: DistributionStats | None
+    perSeries: list[ClassSeriesSummary]
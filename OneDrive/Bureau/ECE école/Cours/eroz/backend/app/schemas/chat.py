@@ -1,6 +1,10 @@
 ﻿from __future__ import annotations
 
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
 
 
 class ChatMessage(BaseModel):
@@ -14,3 +18,19 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     message: str
+
+
+class ConversationMessageRequest(BaseModel):
+    conversationId: str | None = None
+    message: str = Field(min_length=1, max_length=settings.chat_max_message_chars)
+
+
+class ConversationMessageResponse(BaseModel):
+    conversationId: str
+    message: str
+
+
+class ConversationResponse(BaseModel):
+    id: str
+    messages: list[ChatMessage]
+    updatedAt: datetime
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    userId: int
+    firstName: str
+    lastName: str
+    avatar: str | None
+    totalXp: int
+    level: int
+
+
+class LeaderboardMe(BaseModel):
+    rank: int
+    totalXp: int
+    level: int
+
+
+class LeaderboardResponse(BaseModel):
+    scope: str
+    total: int
+    entries: list[LeaderboardEntry]
+    me: LeaderboardMe | None
@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Dict
 
 from pydantic import BaseModel, ConfigDict
@@ -40,9 +40,51 @@ class WeeklyActivityResponse(BaseModel):
     activity: Dict[str, int]
 
 
+class ActivityHeatmapResponse(BaseModel):
+    timezone: str
+    start: date
+    end: date
+    counts: list[int]
+    total: int
+    activeDays: int
+    maxCount: int
+
+
+class XpCurvePoint(BaseModel):
+    date: date
+    xp: int
+    totalXp: int
+
+
+class XpCurveResponse(BaseModel):
+    start: date
+    end: date
+    points: list[XpCurvePoint]
+
+
+class PrecisionTrendPoint(BaseModel):
+    date: date
+    sessions: int
+    precision: float | None
+
+
+class PrecisionTrendResponse(BaseModel):
+    start: date
+    end: date
+    window: int
+    points: list[PrecisionTrendPoint]
+
+
 class XpProgressResponse(BaseModel):
     level: int
     totalXp: int | None = None
     currentXp: int
     xpForNextLevel: int
     progress: int
+
+
+class DashboardResponse(BaseModel):
+    stats: UserStatsResponse
+    sessions: list[TrainingSessionResponse]
+    weeklyActivity: Dict[str, int]
+    xpProgress: XpProgressResponse
@@ -48,6 +48,7 @@ class SeriesDetailResponse(BaseModel):
     createdById: int
     createdAt: datetime
     images: list[SeriesImageResponse] = []
+    version: str | None = None
     status: str | None = None
     score: int | None = None
     precision: float | None = None
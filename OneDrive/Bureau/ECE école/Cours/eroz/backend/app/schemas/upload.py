@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class PresignRequest(BaseModel):
+    purpose: str = "avatar"
+    contentType: str
+    size: int
+    sha256: str
+
+
+class PresignedUploadResponse(BaseModel):
+    method: str
+    url: str
+    headers: dict[str, str]
+    expiresAt: datetime
+
+
+class PresignResponse(BaseModel):
+    key: str
+    url: str
+    upload: PresignedUploadResponse | None = None
+
+
+class CompleteUploadRequest(BaseModel):
+    purpose: str = "avatar"
+    key: str
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import TrainingSession
+
+HEATMAP_DAYS = 365
+WEEKDAY_NAMES = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+
+
+class UnknownTimezone(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ActivityYear:
+    timezone: str
+    end: date
+    counts: tuple[int, ...]
+
+    @property
+    def start(self) -> date:
+        return self.end - timedelta(days=len(self.counts) - 1)
+
+    def weekly(self) -> dict[str, int]:
+        # The last seven local days, one per weekday, keyed Lun..Dim like the dashboard expects.
+        activity = dict.fromkeys(WEEKDAY_NAMES, 0)
+        for offset, count in enumerate(self.counts[-7:]):
+            day = self.end - timedelta(days=6 - offset)
+            activity[WEEKDAY_NAMES[day.weekday()]] = count
+        return activity
+
+
+# One year per user; the key is the user so a submission clears every view at once.
+activity_cache: TTLCache[ActivityYear] = TTLCache(
+    settings.activity_cache_size, settings.activity_cache_ttl_seconds
+)
+
+
+def resolve_timezone(name: str | None) -> ZoneInfo:
+    try:
+        return ZoneInfo(name or settings.activity_timezone)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise UnknownTimezone(name) from exc
+
+
+def local_day_expr(db: Session, zone: ZoneInfo, start_utc: datetime, column=TrainingSession.completedAt):
+    # completedAt is naive UTC. PostgreSQL converts each row to the user's wall clock, so
+    # DST changes inside the window are handled; SQLite (local dev only) has no zone
+    # database and applies the offset in force at the start of the window.
+    if db.get_bind().dialect.name == "postgresql":
+        local = func.timezone(zone.key, func.timezone("UTC", column))
+        return cast(func.date_trunc("day", local), Date)
+    offset = zone.utcoffset(start_utc)
+    return func.date(column, f"{int(offset.total_seconds() // 60):+d} minutes")
+
+
+def daily_counts(db: Session, user_id: int, zone: ZoneInfo, start: date, end: date) -> list[int]:
+    start_utc = (
+        datetime.combine(start, time.min, tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+    )
+    end_utc = (
+        datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+        .astimezone(timezone.utc)
+        .replace(tzinfo=None)
+    )
+    day = local_day_expr(db, zone, start_utc).label("day")
+    rows = (
+        db.query(day, func.count())
+        .filter(TrainingSession.userId == user_id)
+        .filter(TrainingSession.completedAt >= start_utc)
+        .filter(TrainingSession.completedAt < end_utc)
+        .group_by(day)
+        .all()
+    )
+
+    counts = [0] * ((end - start).days + 1)
+    for value, count in rows:
+        if isinstance(value, str):
+            value = date.fromisoformat(value)
+        index = (value - start).days
+        if 0 <= index < len(counts):
+            counts[index] = count
+    return counts
+
+
+def activity_year(db: Session, user_id: int, zone: ZoneInfo) -> ActivityYear:
+    today = datetime.now(zone).date()
+    cached = activity_cache.get(user_id)
+    if cached is not None and cached.timezone == zone.key and cached.end == today:
+        return cached
+
+    start = today - timedelta(days=HEATMAP_DAYS - 1)
+    year = ActivityYear(
+        timezone=zone.key,
+        end=today,
+        counts=tuple(daily_counts(db, user_id, zone, start, today)),
+    )
+    activity_cache.set(user_id, year)
+    return year
+
+
+def invalidate_activity(user_id: int) -> None:
+    activity_cache.delete(user_id)
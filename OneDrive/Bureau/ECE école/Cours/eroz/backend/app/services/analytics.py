@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Enrollment, Series, SeriesProgress, UserDailyStats
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 10
+COMPLETED = "COMPLETED"
+
+# Keyed ("series", id) / ("class", id); submissions and enrollment changes drop the
+# affected entries, the TTL bounds anything else (e.g. a deleted student).
+analytics_cache: TTLCache[dict] = TTLCache(
+    settings.analytics_cache_size, settings.analytics_cache_ttl_seconds
+)
+
+
+def describe(values: np.ndarray) -> dict | None:
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    p10, p25, p50, p75, p90 = np.percentile(values, PERCENTILES)
+    return {
+        "count": int(values.size),
+        "mean": round(float(values.mean()), 2),
+        "std": round(float(values.std()), 2),
+        "min": round(float(values.min()), 2),
+        "p10": round(float(p10), 2),
+        "p25": round(float(p25), 2),
+        "median": round(float(p50), 2),
+        "p75": round(float(p75), 2),
+        "p90": round(float(p90), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+def histogram(values: np.ndarray, upper: float | None = None) -> dict:
+    values = values[~np.isnan(values)]
+    if upper is None:
+        upper = float(values.max()) if values.size else 0.0
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS, range=(0.0, max(upper, 1.0)))
+    return {"edges": [round(float(edge), 2) for edge in edges], "counts": counts.tolist()}
+
+
+def _float_column(rows: list, index: int) -> np.ndarray:
+    # None (no progress row, or no score yet) becomes NaN and drops out of every statistic.
+    return np.array([row[index] for row in rows], dtype=np.float64)
+
+
+def _seconds_between(started: list, completed: list) -> np.ndarray:
+    start = np.array(started, dtype="datetime64[ms]")
+    end = np.array(completed, dtype="datetime64[ms]")
+    seconds = (end - start).astype(np.float64) / 1000
+    seconds[np.isnat(start) | np.isnat(end)] = np.nan
+    return seconds
+
+
+def series_stats(
+    completed: np.ndarray, precision: np.ndarray, score: np.ndarray, seconds: np.ndarray
+) -> dict:
+    # One entry per enrolled student; precision, score and time only count for completed
+    # runs. Time runs from joining the series to the last submission, so results submitted
+    # without joining first (no time measured) are left out of it.
+    precision = np.where(completed, precision, np.nan)
+    score = np.where(completed, score, np.nan)
+    seconds = np.where(completed & (seconds > 0), seconds, np.nan)
+    students = int(completed.size)
+    done = int(completed.sum())
+    return {
+        "students": students,
+        "completed": done,
+        "completionRate": round(done / students, 4) if students else 0.0,
+        "precision": describe(precision),
+        "precisionHistogram": histogram(precision, 100.0),
+        "score": describe(score),
+        "scoreHistogram": histogram(score),
+        "timeToComplete": describe(seconds),
+    }
+
+
+def class_stats(
+    student_ids: np.ndarray,
+    series_ids: np.ndarray,
+    progress_student: np.ndarray,
+    progress_series: np.ndarray,
+    completed: np.ndarray,
+    precision: np.ndarray,
+    score: np.ndarray,
+    time_student: np.ndarray,
+    time_seconds: np.ndarray,
+    time_sessions: np.ndarray,
+) -> dict:
+    # ids arrays are sorted; progress and time rows are mapped onto them with searchsorted
+    # and reduced with bincount, so the cost is linear in rows whatever the class size.
+    n_students, n_series = student_ids.size, series_ids.size
+    student_index = np.searchsorted(student_ids, progress_student)
+    series_index = np.searchsorted(series_ids, progress_series)
+    done_precision = np.where(completed, precision, np.nan)
+    done_score = np.where(completed, score, np.nan)
+    has_precision = completed & ~np.isnan(precision)
+
+    per_series_done = np.bincount(series_index[completed], minlength=n_series)
+    per_series_precision = np.bincount(
+        series_index[has_precision], weights=precision[has_precision], minlength=n_series
+    )
+    per_series_counted = np.bincount(series_index[has_precision], minlength=n_series)
+
+    per_student_precision = np.bincount(
+        student_index[has_precision], weights=precision[has_precision], minlength=n_students
+    )
+    per_student_counted = np.bincount(student_index[has_precision], minlength=n_students)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        student_means = per_student_precision / per_student_counted
+        series_means = per_series_precision / per_series_counted
+
+    seconds = np.zeros(n_students)
+    sessions = np.zeros(n_students)
+    time_index = np.searchsorted(student_ids, time_student)
+    seconds[time_index] = time_seconds
+    sessions[time_index] = time_sessions
+
+    pairs = n_students * n_series
+    return {
+        "students": int(n_students),
+        "series": int(n_series),
+        "completed": int(completed.sum()),
+        "completionRate": round(int(completed.sum()) / pairs, 4) if pairs else 0.0,
+        "precision": describe(done_precision),
+        "precisionHistogram": histogram(done_precision, 100.0),
+        "score": describe(done_score),
+        "scoreHistogram": histogram(done_score),
+        "studentPrecision": describe(student_means),
+        "timeSpent": describe(seconds),
+        "timeSpentHistogram": histogram(seconds),
+        "sessionsPerStudent": describe(sessions),
+        "perSeries": [
+            {
+                "seriesId": int(series_id),
+                "completed": int(per_series_done[i]),
+                "completionRate": round(int(per_series_done[i]) / n_students, 4) if n_students else 0.0,
+                "meanPrecision": None if np.isnan(series_means[i]) else round(float(series_means[i]), 2),
+            }
+            for i, series_id in enumerate(series_ids)
+        ],
+    }
+
+
+def series_analytics(db: Session, series: Series) -> dict:
+    key = ("series", series.id)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Every enrolled student, with their progress on this series when there is one.
+    rows = (
+        db.query(
+            SeriesProgress.status,
+            SeriesProgress.precision,
+            SeriesProgress.score,
+            SeriesProgress.startedAt,
+            SeriesProgress.completedAt,
+        )
+        .select_from(Enrollment)
+        .outerjoin(
+            SeriesProgress,
+            and_(SeriesProgress.userId == Enrollment.userId, SeriesProgress.seriesId == series.id),
+        )
+        .filter(Enrollment.classroomId == series.classroomId)
+        .all()
+    )
+    completed = np.array([row[0] == COMPLETED for row in rows], dtype=bool)
+    result = {
+        "seriesId": series.id,
+        "classroomId": series.classroomId,
+        **series_stats(
+            completed,
+            _float_column(rows, 1),
+            _float_column(rows, 2),
+            _seconds_between([row[3] for row in rows], [row[4] for row in rows]),
+        ),
+    }
+    analytics_cache.set(key, result)
+    return result
+
+
+def class_analytics(db: Session, classroom_id: int) -> dict:
+    key = ("class", classroom_id)
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    student_ids = np.array(
+        sorted(row[0] for row in db.query(Enrollment.userId).filter(Enrollment.classroomId == classroom_id)),
+        dtype=np.int64,
+    )
+    series_rows = (
+        db.query(Series.id, Series.title).filter(Series.classroomId == classroom_id).order_by(Series.id).all()
+    )
+    series_ids = np.array([row[0] for row in series_rows], dtype=np.int64)
+    progress = (
+        db.query(
+            SeriesProgress.userId,
+            SeriesProgress.seriesId,
+            SeriesProgress.status,
+            SeriesProgress.precision,
+            SeriesProgress.score,
+        )
+        .join(Series, Series.id == SeriesProgress.seriesId)
+        .join(
+            Enrollment,
+            and_(Enrollment.userId == SeriesProgress.userId, Enrollment.classroomId == Series.classroomId),
+        )
+        .filter(Series.classroomId == classroom_id)
+        .all()
+    )
+    # Training time is not tied to a series, so it is each student's total on the platform,
+    # read from the daily rollup: it still counts sessions moved to the archive.
+    time_rows = (
+        db.query(UserDailyStats.userId, func.sum(UserDailyStats.durationSum), func.sum(UserDailyStats.sessions))
+        .join(Enrollment, Enrollment.userId == UserDailyStats.userId)
+        .filter(Enrollment.classroomId == classroom_id)
+        .group_by(UserDailyStats.userId)
+        .all()
+    )
+
+    stats = class_stats(
+        student_ids,
+        series_ids,
+        np.array([row[0] for row in progress], dtype=np.int64),
+        np.array([row[1] for row in progress], dtype=np.int64),
+        np.array([row[2] == COMPLETED for row in progress], dtype=bool),
+        _float_column(progress, 3),
+        _float_column(progress, 4),
+        np.array([row[0] for row in time_rows], dtype=np.int64),
+        _float_column(time_rows, 1),
+        _float_column(time_rows, 2),
+    )
+    titles = dict(series_rows)
+    for entry in stats["perSeries"]:
+        entry["title"] = titles[entry["seriesId"]]
+    result = {"classroomId": classroom_id, **stats}
+    analytics_cache.set(key, result)
+    return result
+
+
+def invalidate_analytics(classroom_id: int, series_ids: Iterable[int] = ()) -> None:
+    analytics_cache.delete(("class", classroom_id))
+    for series_id in series_ids:
+        analytics_cache.delete(("series", series_id))
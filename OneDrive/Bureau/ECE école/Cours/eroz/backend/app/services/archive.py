@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models import TrainingSession, TrainingSessionArchive
+from app.services.export import iter_export
+from app.services.partitions import (
+    SESSION_FIELDS,
+    TABLE,
+    add_months,
+    existing_partitions,
+    is_partitioned,
+    month_start,
+    partition_name,
+)
+
+
+def retention_cutoff(months: int) -> date:
+    # Whole months only: with months=12 in March 2026, everything before March 2025 goes.
+    return add_months(month_start(datetime.utcnow()), -months)
+
+
+def _in_month(month: date):
+    start = datetime.combine(month, datetime.min.time())
+    end = datetime.combine(add_months(month, 1), datetime.min.time())
+    return and_(TrainingSession.completedAt >= start, TrainingSession.completedAt < end)
+
+
+def _count(db: Session, month: date) -> int:
+    return db.query(func.count()).select_from(TrainingSession).filter(_in_month(month)).scalar()
+
+
+def _archive_month(db: Session, month: date, csv_dir: str | None, partitioned: bool) -> int:
+    rows = _count(db, month)
+    if not rows:
+        return 0
+
+    in_month = _in_month(month)
+    columns = [TrainingSession.__table__.c[name] for name in SESSION_FIELDS]
+
+    if csv_dir:
+        path = os.path.join(csv_dir, f"{TABLE}-{month:%Y-%m}.csv.gz")
+        with open(f"{path}.part", "wb") as handle:
+            for chunk in iter_export(select(*columns).where(in_month).order_by(TrainingSession.id), "csv", True):
+                handle.write(chunk)
+        os.replace(f"{path}.part", path)
+    else:
+        db.execute(
+            insert(TrainingSessionArchive).from_select(SESSION_FIELDS, select(*columns).where(in_month))
+        )
+
+    # A month with its own partition is dropped whole: no dead rows left to vacuum.
+    if partitioned and month in existing_partitions(db.connection()):
+        db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {partition_name(month)}"))
+        db.execute(text(f"DROP TABLE {partition_name(month)}"))
+    else:
+        db.execute(delete(TrainingSession).where(in_month))
+    db.commit()
+    return rows
+
+
+def archive_sessions(
+    db: Session, months: int, *, csv_dir: str | None = None, dry_run: bool = False
+) -> list[tuple[date, int]]:
+    """Move training sessions older than `months` whole months out of training_sessions.
+
+    Rows go to training_sessions_archive, or to one gzipped CSV per month in csv_dir
+    (they then leave the database for good). Each month is its own transaction.
+    Per-user stats and the daily rollup are left as they are.
+    """
+    cutoff = retention_cutoff(months)
+    oldest = db.query(func.min(TrainingSession.completedAt)).scalar()
+    if oldest is None:
+        return []
+
+    partitioned = is_partitioned(db.connection())
+    archived = []
+    month = month_start(oldest)
+    while month < cutoff:
+        rows = _count(db, month) if dry_run else _archive_month(db, month, csv_dir, partitioned)
+        if rows:
+            archived.append((month, rows))
+        month = add_months(month, 1)
+    return archived
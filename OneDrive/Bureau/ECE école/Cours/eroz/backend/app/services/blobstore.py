@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.models import SeriesImage, User
+from app.services.storage import get_storage, staging_file
+
+BLOB_PREFIX = "blobs"
+# Derived variants (e.g. "<digest>.thumb256.jpg") share their source's digest, so they
+# live and die with it.
+BLOB_URL_RE = re.compile(r"(?:^|/)blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?P<ext>(?:\.[a-z0-9]+)*)$")
+
+# Every column that may hold a blob URL. The garbage collector only keeps
+# blobs reachable from one of these, so new referencing columns must be added here.
+BLOB_REFERENCES = [User.avatar, SeriesImage.imageUrl]
+
+
+class BlobTooLargeError(ValueError):
+    pass
+
+
+@dataclass
+class GcReport:
+    scanned: int = 0
+    referenced: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    freed_bytes: int = 0
+
+
+def blob_key(digest: str, ext: str) -> str:
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def blob_url(digest: str, ext: str) -> str:
+    return get_storage().url(blob_key(digest, ext))
+
+
+def parse_blob_url(url: str | None) -> str | None:
+    if not url:
+        return None
+    match = BLOB_URL_RE.search(url)
+    return match.group("digest") if match else None
+
+
+def store_chunks(chunks: Iterable[bytes], ext: str, max_size: int | None = None) -> str:
+    storage = get_storage()
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = staging_file()
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise BlobTooLargeError(f"Blob exceeds {max_size} bytes")
+                hasher.update(chunk)
+                buffer.write(chunk)
+
+        digest = hasher.hexdigest()
+        commit_staged(tmp_path, digest, ext)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return storage.url(blob_key(digest, ext))
+
+
+def commit_staged(tmp_path: Path, digest: str, ext: str) -> str:
+    storage = get_storage()
+    key = blob_key(digest, ext)
+    if storage.exists(key):
+        # Dedup hit: refresh mtime so a concurrent GC run treats it as freshly written.
+        storage.touch(key)
+        tmp_path.unlink(missing_ok=True)
+    else:
+        storage.put_file(tmp_path, key, mimetypes.guess_type(key)[0])
+    return key
+
+
+def store_bytes(data: bytes, ext: str) -> str:
+    return store_chunks([data], ext)
+
+
+def referenced_digests(db: Session) -> set[str]:
+    digests: set[str] = set()
+    for column in BLOB_REFERENCES:
+        rows = db.query(column).filter(column.like(f"%/{BLOB_PREFIX}/%")).yield_per(5000)
+        for (url,) in rows:
+            digest = parse_blob_url(url)
+            if digest:
+                digests.add(digest)
+    return digests
+
+
+def collect_garbage(
+    db: Session,
+    *,
+    batch_size: int = 500,
+    grace_seconds: int = 3600,
+    dry_run: bool = False,
+) -> GcReport:
+    storage = get_storage()
+    report = GcReport()
+
+    # Mark first, then only sweep objects older than the grace period: anything
+    # written after the mark started may belong to a request still in flight.
+    cutoff = time.time() - grace_seconds
+    referenced = referenced_digests(db)
+
+    batch: list[str] = []
+    for obj in storage.iter_objects(f"{BLOB_PREFIX}/"):
+        report.scanned += 1
+        if obj.modified > cutoff:
+            report.skipped += 1
+            continue
+        digest = parse_blob_url(obj.key)
+        if digest is None or digest in referenced:
+            report.referenced += 1
+            continue
+        report.deleted += 1
+        report.freed_bytes += obj.size
+        batch.append(obj.key)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                storage.delete_many(batch)
+            batch = []
+    if batch and not dry_run:
+        storage.delete_many(batch)
+
+    if not dry_run and storage.staging_dir.exists():
+        for entry in os.scandir(storage.staging_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+
+    return report
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import secrets
+import zipfile
+from typing import Iterable, Iterator, NamedTuple
+
+from PIL import Image
+
+from app.services.blobstore import BLOB_URL_RE, commit_staged, parse_blob_url
+from app.services.storage import get_storage, staging_file
+
+BUNDLE_FORMATS = {"zip", "multipart"}
+BUNDLE_VARIANTS = {"full", "thumb"}
+THUMB_SIZE = 256
+
+
+class BundleImage(NamedTuple):
+    id: int
+    orderIndex: int
+    imageUrl: str
+
+
+class _Sink:
+    # Write-only, unseekable: zipfile falls back to data descriptors and never seeks back.
+    def __init__(self):
+        self.parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def series_version(images: Iterable[BundleImage]) -> str:
+    hasher = hashlib.sha256()
+    for img in images:
+        hasher.update(f"{img.id}:{img.orderIndex}:{img.imageUrl}\n".encode())
+    return hasher.hexdigest()[:16]
+
+
+def _thumbnail(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((THUMB_SIZE, THUMB_SIZE))
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def _thumbnail_key(source_key: str) -> str | None:
+    match = BLOB_URL_RE.search(source_key)
+    if not match or match.group("ext").count(".") != 1:
+        return None
+    return source_key[: -len(match.group("ext"))] + f".thumb{THUMB_SIZE}.jpg"
+
+
+def _thumbnail_chunks(key: str) -> Iterator[bytes]:
+    storage = get_storage()
+    thumb_key = _thumbnail_key(key)
+    if thumb_key and storage.exists(thumb_key):
+        yield from storage.iter_chunks(thumb_key)
+        return
+
+    data = _thumbnail(b"".join(storage.iter_chunks(key)))
+    if thumb_key:
+        # Cache content-addressed sources only; they never change under the same key.
+        fd, tmp_path = staging_file()
+        with os.fdopen(fd, "wb") as buffer:
+            buffer.write(data)
+        commit_staged(tmp_path, parse_blob_url(key), f".thumb{THUMB_SIZE}.jpg")
+    yield data
+
+
+def _entries(images: list[BundleImage], variant: str, start: int) -> Iterator[tuple[int, BundleImage, str, Iterator[bytes]]]:
+    storage = get_storage()
+    for index, img in enumerate(images):
+        if index < start:
+            continue
+        key = storage.key_for_url(img.imageUrl)
+        if key is None or storage.stat(key) is None:
+            continue
+        if variant == "thumb":
+            try:
+                # Thumbnails are small: build them before the entry header goes out so a
+                # corrupt source is skipped instead of truncating the stream.
+                chunks = list(_thumbnail_chunks(key))
+            except (OSError, ValueError, Image.DecompressionBombError):
+                continue
+            yield index, img, "image/jpeg", iter(chunks)
+        else:
+            media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+            yield index, img, media_type, storage.iter_chunks(key)
+
+
+def _manifest(images: list[BundleImage], version: str, variant: str, start: int) -> bytes:
+    return json.dumps(
+        {
+            "version": version,
+            "variant": variant,
+            "start": start,
+            "images": [
+                {"index": index, "id": img.id, "orderIndex": img.orderIndex, "imageUrl": img.imageUrl}
+                for index, img in enumerate(images)
+                if index >= start
+            ],
+        }
+    ).encode()
+
+
+def _entry_name(index: int, img: BundleImage, media_type: str) -> str:
+    ext = mimetypes.guess_extension(media_type) or ""
+    return f"{index:04d}-{img.id}{'.jpg' if ext == '.jpe' else ext}"
+
+
+def iter_zip_bundle(images: list[BundleImage], version: str, variant: str, start: int) -> Iterator[bytes]:
+    # Images are already compressed, so entries are STORED: no CPU spent and a constant
+    # memory footprint of one read chunk regardless of series size.
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        zf.writestr("manifest.json", _manifest(images, version, variant, start))
+        yield sink.drain()
+        for index, img, media_type, chunks in _entries(images, variant, start):
+            info = zipfile.ZipInfo(_entry_name(index, img, media_type))
+            info.compress_type = zipfile.ZIP_STORED
+            with zf.open(info, "w", force_zip64=False) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def multipart_boundary() -> str:
+    return f"eroz-{secrets.token_hex(12)}"
+
+
+def iter_multipart_bundle(
+    images: list[BundleImage], version: str, variant: str, start: int, boundary: str
+) -> Iterator[bytes]:
+    delimiter = f"--{boundary}\r\n".encode()
+    manifest = _manifest(images, version, variant, start)
+    yield delimiter + (
+        f"Content-Type: application/json\r\nContent-Length: {len(manifest)}\r\n\r\n".encode()
+    ) + manifest + b"\r\n"
+    for index, img, media_type, chunks in _entries(images, variant, start):
+        yield delimiter + (
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Location: {img.imageUrl}\r\n"
+            f"X-Image-Index: {index}\r\n"
+            f"X-Image-Id: {img.id}\r\n\r\n"
+        ).encode()
+        yield from chunks
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode()
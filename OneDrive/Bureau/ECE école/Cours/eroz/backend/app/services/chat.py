@@ -1,22 +1,134 @@
 ﻿from __future__ import annotations
 
-from typing import Iterable
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable
 
-from groq import Groq
+import anyio
 
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.models import TrainingSession, User, UserStats
+from app.services.chat_history import message_tokens, prompt_tokens, split_history
+from app.services.faq import STAFF, STUDENT, FaqResult, lookup_faq, normalize_text
+from app.services.llm import get_llm_client, llm_slot
+
+PLATFORM_KNOWLEDGE = """
+Connaissance de la Plateforme Eroz :
+1. "Accueil" : Vue d'ensemble et acces rapide.
+2. "S'entrainer" :
+   - C'est ici que l'on pratique.
+   - On choisit une serie (Radio, Scanner, IRM) et un niveau de difficulte.
+   - On annote les images et on recoit une correction immediate par IA.
+3. "Mes classes" (Pour les Etudiants) :
+   - Liste les classes ou l'etudiant est inscrit.
+   - Permet de rejoindre une nouvelle classe avec un CODE fourni par le prof.
+   - Donne acces aux series d'entrainement specifiques a la classe.
+4. "Gestion des classes" (Pour les Profs/Admins) :
+   - Permet de CREER des classes et de generer des codes d'invitation.
+   - Permet de voir la liste des etudiants et leurs resultats.
+   - Permet de creer des series d'examens ou d'entrainement.
+5. "Veille Medicale" : Flux d'actualites et articles sur l'imagerie medicale.
+6. "Progression" : Historique des sessions et statistiques detailles (XP, precision).
+7. "Nous contacter" : Pour contacter le support ou l'equipe pedagogique.
+
+Si l'utilisateur est un Etudiant qui demande comment rejoindre un cours : explique-lui d'aller dans "Mes classes" et d'entrer le code donne par son prof.
+Si l'utilisateur est un Prof qui veut creer un cours : dirige-le vers "Gestion des classes", une fois qu il en aura créer une nouvelle il pourra partager le code de celle ci aux étudiants qu il souhaite.
+""".strip()
+
+TONE_PROMPT = """
+Ton ton :
+- Professionnel, bienveillant, et encourageant.
+- Tu utilises le **gras** (avec deux etoiles) pour mettre en valeur les mots cles importants.
+- Sois concis.
+""".strip()
+
+# Single-turn answers only depend on the question, the role and how the student is doing,
+# so navigation questions asked by many users share one LLM call.
+response_cache: TTLCache[str] = TTLCache(settings.chat_cache_max_entries, settings.chat_cache_ttl_seconds)
+
 
+@dataclass
+class _Flight:
+    future: asyncio.Future
+    names: tuple[str, ...]
 
-def generate_chat_response(
+
+class _LeaderGone(Exception):
+    pass
+
+
+# Identical requests in flight at the same time share one LLM call.
+_flights: dict[str, _Flight] = {}
+coalesce_stats = {"calls": 0, "coalesced": 0}
+
+
+@dataclass
+class ChatContext:
+    profile: str
+    role: str
+    bucket: str
+    names: tuple[str, ...]
+
+    def system_prompt(self, knowledge: str | None = None, summary: str | None = None) -> str:
+        # Retrieved FAQ snippets replace the full platform description when available.
+        prompt = assemble_system_prompt(self.profile, knowledge or PLATFORM_KNOWLEDGE)
+        if summary:
+            prompt += f"\n\nResume des echanges precedents :\n{summary}"
+        return prompt
+
+
+# Per-user prompt profile. Only a new training session (or a role change) alters it, and
+# those paths call invalidate_chat_context; the TTL is a safety net.
+context_cache: TTLCache[ChatContext] = TTLCache(
+    settings.chat_context_cache_size, settings.chat_context_cache_ttl_seconds
+)
+
+
+def assemble_system_prompt(profile: str, knowledge: str = PLATFORM_KNOWLEDGE) -> str:
+    return f"{profile}\n\n{knowledge}\n\n{TONE_PROMPT}"
+
+
+def chat_role(user: User | None) -> str:
+    return STAFF if user and user.role in ["PROF", "ADMIN"] else STUDENT
+
+
+def performance_bucket(sessions: list[TrainingSession]) -> str:
+    if not sessions:
+        return "new"
+    recent_avg = sum(s.precision for s in sessions) / len(sessions)
+    if recent_avg < 50:
+        return "struggling"
+    if recent_avg > 80:
+        return "excelling"
+    return "steady"
+
+
+def build_chat_context(
     *,
-    messages: list[dict] | list,
     user: User | None,
     stats: UserStats | None,
     sessions: Iterable[TrainingSession],
-) -> str:
-    client = Groq(api_key=settings.groq_api_key)
+) -> ChatContext:
+    sessions_list = list(sessions)
+    return ChatContext(
+        profile=build_profile_prompt(user=user, stats=stats, sessions=sessions_list),
+        role=chat_role(user),
+        bucket=performance_bucket(sessions_list),
+        names=tuple(name for name in (user.firstName, user.lastName) if name) if user else (),
+    )
+
 
+def build_profile_prompt(
+    *,
+    user: User | None,
+    stats: UserStats | None,
+    sessions: Iterable[TrainingSession],
+) -> str:
     user_name = f"{user.firstName} {user.lastName}" if user else "Etudiant"
     user_level = stats.level if stats else 1
     avg_score = stats.averageScore if stats else 0
@@ -35,7 +147,7 @@ def generate_chat_response(
         elif recent_avg > 80:
             performance_context += " L'utilisateur excelle, suggere-lui de passer a un niveau superieur."
 
-    system_prompt = f"""
+    return f"""
 Tu es l'Assistant Eroz, un expert en imagerie medicale pedagogique et le guide personnel de {user_name} sur la plateforme Eroz.
 
 Ton role :
@@ -47,47 +159,158 @@ Contexte Utilisateur :
 - Role : {"PROFESSEUR/ADMIN" if user.role in ["PROF", "ADMIN"] else "ETUDIANT"}
 - Niveau : {user_level}
 - Performance : {performance_context}
+    """.strip()
 
-Connaissance de la Plateforme Eroz :
-1. "Accueil" : Vue d'ensemble et acces rapide.
-2. "S'entrainer" :
-   - C'est ici que l'on pratique.
-   - On choisit une serie (Radio, Scanner, IRM) et un niveau de difficulte.
-   - On annote les images et on recoit une correction immediate par IA.
-3. "Mes classes" (Pour les Etudiants) :
-   - Liste les classes ou l'etudiant est inscrit.
-   - Permet de rejoindre une nouvelle classe avec un CODE fourni par le prof.
-   - Donne acces aux series d'entrainement specifiques a la classe.
-4. "Gestion des classes" (Pour les Profs/Admins) :
-   - Permet de CREER des classes et de generer des codes d'invitation.
-   - Permet de voir la liste des etudiants et leurs resultats.
-   - Permet de creer des series d'examens ou d'entrainement.
-5. "Veille Medicale" : Flux d'actualites et articles sur l'imagerie medicale.
-6. "Progression" : Historique des sessions et statistiques detailles (XP, precision).
-7. "Nous contacter" : Pour contacter le support ou l'equipe pedagogique.
 
-Ton ton :
-- Professionnel, bienveillant, et encourageant.
-- Tu utilises le **gras** (avec deux etoiles) pour mettre en valeur les mots cles importants.
-- Sois concis.
+def get_chat_context(db: Session, user_id: int) -> ChatContext:
+    context = context_cache.get(user_id)
+    if context is None:
+        user = db.get(User, user_id)
+        stats = db.query(UserStats).filter(UserStats.userId == user_id).first()
+        sessions = (
+            db.query(TrainingSession)
+            .filter(TrainingSession.userId == user_id)
+            .order_by(TrainingSession.completedAt.desc())
+            .limit(5)
+            .all()
+        )
+        context = build_chat_context(user=user, stats=stats, sessions=sessions)
+        context_cache.set(user_id, context)
+    return context
 
-Si l'utilisateur est un Etudiant qui demande comment rejoindre un cours : explique-lui d'aller dans "Mes classes" et d'entrer le code donne par son prof.
-Si l'utilisateur est un Prof qui veut creer un cours : dirige-le vers "Gestion des classes", une fois qu il en aura créer une nouvelle il pourra partager le code de celle ci aux étudiants qu il souhaite.
-    """.strip()
 
-    trimmed_messages = []
-    for msg in messages[-10:]:
-        trimmed_messages.append({"role": msg.role if hasattr(msg, "role") else msg["role"], "content": msg.content if hasattr(msg, "content") else msg["content"]})
+def invalidate_chat_context(user_id: int) -> None:
+    context_cache.delete(user_id)
 
-    completion = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            *trimmed_messages,
-        ],
+
+def build_system_prompt(
+    *,
+    user: User | None,
+    stats: UserStats | None,
+    sessions: Iterable[TrainingSession],
+) -> str:
+    return assemble_system_prompt(build_profile_prompt(user=user, stats=stats, sessions=sessions))
+
+
+def _field(msg, name: str) -> str:
+    return getattr(msg, name) if hasattr(msg, name) else msg[name]
+
+
+def last_user_message(messages: list[dict] | list) -> str | None:
+    if not messages or _field(messages[-1], "role") != "user":
+        return None
+    return _field(messages[-1], "content")
+
+
+def faq_for(messages: list[dict] | list, role: str) -> FaqResult:
+    question = last_user_message(messages)
+    return lookup_faq(question, role) if question else FaqResult()
+
+
+def response_cache_key(messages: list[dict] | list, context: ChatContext) -> str | None:
+    # Any earlier user turn can change what the right answer is: bypass the cache.
+    user_turns = [msg for msg in messages if _field(msg, "role") == "user"]
+    if len(user_turns) != 1 or _field(messages[-1], "role") != "user":
+        return None
+    question = normalize_text(_field(messages[-1], "content"))
+    if not question:
+        return None
+    return f"{context.role}:{context.bucket}:{question}"
+
+
+def cache_response(key: str | None, answer: str, context: ChatContext) -> None:
+    # Never share an answer that addresses the user by name.
+    if key is None or any(name.casefold() in answer.casefold() for name in context.names):
+        return
+    response_cache.set(key, answer)
+
+
+def message_dicts(messages: list[dict] | list) -> list[dict]:
+    return [{"role": _field(msg, "role"), "content": _field(msg, "content")} for msg in messages]
+
+
+def build_chat_messages(messages: list[dict] | list, system_prompt: str) -> list[dict]:
+    # Newest turns first until the token budget is spent; older ones live on in the summary.
+    history = message_dicts(messages)
+    trimmed_messages = history[split_history(history, settings.chat_history_token_budget):]
+
+    prompt = [{"role": "system", "content": system_prompt}, *trimmed_messages]
+    prompt_tokens.record(sum(message_tokens(message) for message in prompt))
+    return prompt
+
+
+def _mentions(answer: str, names: tuple[str, ...]) -> bool:
+    return any(name.casefold() in answer.casefold() for name in names)
+
+
+async def generate_chat_response(
+    *,
+    messages: list[dict] | list,
+    system_prompt: str,
+    share_key: str | None = None,
+    names: tuple[str, ...] = (),
+) -> str:
+    """`share_key` lets different users with an equivalent question share a call; without it
+    only byte-identical prompts are coalesced."""
+    prompt = build_chat_messages(messages, system_prompt)
+    key = share_key or "prompt:" + hashlib.sha256(json.dumps(prompt).encode()).hexdigest()
+
+    flight = _flights.get(key)
+    if flight is not None:
+        try:
+            answer = await asyncio.shield(flight.future)
+        except _LeaderGone:
+            answer = None
+        # An answer addressed to someone else is not shareable: make our own call.
+        if answer is not None and (flight.names == names or not _mentions(answer, flight.names)):
+            coalesce_stats["coalesced"] += 1
+            return answer
+
+    future = asyncio.get_running_loop().create_future()
+    # Mark the exception retrieved even when nobody else waited on it.
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+    _flights[key] = _Flight(future=future, names=names)
+    coalesce_stats["calls"] += 1
+    try:
+        async with llm_slot():
+            completion = await get_llm_client().chat.completions.create(
+                model=settings.groq_model,
+                messages=prompt,
+                temperature=0.7,
+                max_tokens=500,
+            )
+        content = completion.choices[0].message.content if completion.choices else None
+        answer = content or "Desole, je n'ai pas pu generer de reponse."
+        future.set_result(answer)
+        return answer
+    except asyncio.CancelledError:
+        future.set_exception(_LeaderGone())
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        if _flights.get(key) is not None and _flights[key].future is future:
+            del _flights[key]
+
+
+async def stream_chat_response(*, messages: list[dict] | list, system_prompt: str) -> AsyncIterator[str]:
+    # Callers hold an LLM slot (acquire_llm/release_llm) for the lifetime of the stream, so
+    # that a full bulkhead can still be answered with a 503 before the response starts.
+    stream = await get_llm_client().chat.completions.create(
+        model=settings.groq_model,
+        messages=build_chat_messages(messages, system_prompt),
         temperature=0.7,
         max_tokens=500,
+        stream=True,
     )
-
-    content = completion.choices[0].message.content if completion.choices else None
-    return content or "Desole, je n'ai pas pu generer de reponse."
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    finally:
+        # Runs on client disconnect too. Dropping the upstream connection is what makes the
+        # provider stop generating, so it must not be skipped by the pending cancellation.
+        with anyio.CancelScope(shield=True):
+            await stream.close()
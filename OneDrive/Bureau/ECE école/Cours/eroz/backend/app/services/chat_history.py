@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import Distribution
+from app.models import ChatSummary
+from app.services.llm import LLMUnavailable, get_llm_client, llm_slot
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# Chat formats add a few tokens of framing around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+prompt_tokens = Distribution()
+summaries_written = 0
+
+_pending_keys: set[str] = set()
+_tasks: set[asyncio.Task] = set()
+
+
+def estimate_tokens(text: str) -> int:
+    # Llama-style BPE splits French words into ~1.3 tokens on average; close enough to
+    # budget prompts without shipping the real tokenizer.
+    return math.ceil(len(TOKEN_RE.findall(text)) * 1.3)
+
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_history(messages: list[dict], budget: int) -> int:
+    """Index of the oldest message kept so the kept suffix fits in `budget` tokens.
+
+    The last message is always kept, even when it alone is over budget.
+    """
+    used = 0
+    for index in range(len(messages) - 1, -1, -1):
+        used += message_tokens(messages[index])
+        if used > budget and index < len(messages) - 1:
+            return index + 1
+    return 0
+
+
+def _chain_keys(user_id: int, messages: list[dict]) -> list[str]:
+    # keys[i] identifies messages[: i + 1], so a summary is found again whatever the client
+    # sends after it, as long as the earlier turns are unchanged.
+    keys = []
+    digest = hashlib.sha256(f"user:{user_id}".encode()).digest()
+    for message in messages:
+        digest = hashlib.sha256(digest + f"{message['role']}\0{message['content']}\0".encode()).digest()
+        keys.append(digest.hex())
+    return keys
+
+
+@dataclass
+class HistorySummary:
+    text: str | None = None
+    # Set when enough turns fell out of the window since the last summary to write a new one.
+    refresh: tuple[str, int, list[dict]] | None = None
+
+
+def load_summary(db: Session, user_id: int, messages: list[dict]) -> HistorySummary:
+    if not settings.chat_summary_enabled:
+        return HistorySummary()
+    start = split_history(messages, settings.chat_history_token_budget)
+    if start == 0:
+        return HistorySummary()
+
+    older = messages[:start]
+    keys = _chain_keys(user_id, older)
+    row = (
+        db.query(ChatSummary.coveredMessages, ChatSummary.summary)
+        .filter(ChatSummary.userId == user_id, ChatSummary.key.in_(keys))
+        .order_by(ChatSummary.coveredMessages.desc())
+        .first()
+    )
+    covered, text = row if row else (0, None)
+
+    result = HistorySummary(text=text)
+    unsummarized = older[covered:]
+    if sum(message_tokens(message) for message in unsummarized) >= settings.chat_summary_min_tokens:
+        result.refresh = (keys[-1], start, ([{"role": "system", "content": text}] if text else []) + unsummarized)
+    return result
+
+
+async def _summarize(messages: list[dict]) -> str:
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    async with llm_slot():
+        completion = await get_llm_client().chat.completions.create(
+            model=settings.groq_model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Resume cette conversation entre un etudiant et l'Assistant Eroz en 5 phrases maximum. "
+                        "Garde les questions posees, les points medicaux importants et les conseils deja donnes."
+                    ),
+                },
+                {"role": "user", "content": transcript},
+            ],
+            temperature=0.2,
+            max_tokens=200,
+        )
+    return (completion.choices[0].message.content or "").strip() if completion.choices else ""
+
+
+def _store_summary(user_id: int, key: str, covered: int, text: str) -> None:
+    global summaries_written
+    db = SessionLocal()
+    try:
+        db.add(ChatSummary(userId=user_id, key=key, coveredMessages=covered, summary=text))
+        cutoff = datetime.utcnow() - timedelta(days=settings.chat_summary_ttl_days)
+        db.query(ChatSummary).filter(ChatSummary.createdAt < cutoff).delete(synchronize_session=False)
+        db.commit()
+        summaries_written += 1
+    except IntegrityError:
+        # Another worker summarized the same turns first.
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _refresh_summary(user_id: int, key: str, covered: int, messages: list[dict]) -> None:
+    try:
+        text = await _summarize(messages)
+        if text:
+            await run_in_threadpool(_store_summary, user_id, key, covered, text)
+    except LLMUnavailable:
+        # Chat traffic has priority; the next turn will ask again.
+        pass
+    except Exception:
+        logger.exception("Chat summary failed")
+    finally:
+        _pending_keys.discard(key)
+
+
+def schedule_summary(user_id: int, summary: HistorySummary) -> None:
+    """Summarize off the request path; the next turn picks the result up."""
+    if summary.refresh is None or summary.refresh[0] in _pending_keys:
+        return
+    key, covered, messages = summary.refresh
+    _pending_keys.add(key)
+    task = asyncio.create_task(_refresh_summary(user_id, key, covered, messages))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def history_stats() -> dict:
+    return {"promptTokens": prompt_tokens.stats(), "summariesWritten": summaries_written}
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import ChatConversation, ChatMessage
+
+PURGE_INTERVAL_SECONDS = 3600
+
+
+@dataclass
+class Conversation:
+    id: str
+    userId: int
+    messages: list[dict] = field(default_factory=list)
+    updatedAt: datetime = field(default_factory=datetime.utcnow)
+
+
+# Recent conversations stay in memory so a follow-up message costs no DB read.
+conversation_cache: TTLCache[Conversation] = TTLCache(
+    settings.chat_conversation_cache_size, settings.chat_conversation_cache_ttl_seconds
+)
+_last_purge = 0.0
+
+
+def create_conversation(db: Session, user_id: int) -> Conversation:
+    _maybe_purge(db)
+    row = ChatConversation(id=uuid.uuid4().hex, userId=user_id)
+    db.add(row)
+    db.commit()
+    conversation = Conversation(id=row.id, userId=user_id, updatedAt=row.updatedAt)
+    conversation_cache.set(row.id, conversation)
+    return conversation
+
+
+def get_conversation(db: Session, conversation_id: str, user_id: int) -> Conversation | None:
+    conversation = conversation_cache.get(conversation_id)
+    if conversation is None:
+        row = db.get(ChatConversation, conversation_id)
+        if row is None:
+            return None
+        conversation = Conversation(
+            id=row.id,
+            userId=row.userId,
+            messages=[{"role": message.role, "content": message.content} for message in row.messages],
+            updatedAt=row.updatedAt,
+        )
+        conversation_cache.set(row.id, conversation)
+    return conversation if conversation.userId == user_id else None
+
+
+def append_turn(conversation: Conversation, question: str, answer: str) -> None:
+    """Persist one user/assistant exchange and update the cached copy."""
+    expected = len(conversation.messages)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.add_all(
+            [
+                ChatMessage(conversationId=conversation.id, role="user", content=question),
+                ChatMessage(conversationId=conversation.id, role="assistant", content=answer),
+            ]
+        )
+        updated = (
+            db.query(ChatConversation)
+            .filter(ChatConversation.id == conversation.id, ChatConversation.messageCount == expected)
+            .update(
+                {ChatConversation.messageCount: expected + 2, ChatConversation.updatedAt: now},
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            # Another worker appended since this copy was loaded: keep the turn, drop the copy.
+            db.query(ChatConversation).filter(ChatConversation.id == conversation.id).update(
+                {ChatConversation.messageCount: ChatConversation.messageCount + 2, ChatConversation.updatedAt: now},
+                synchronize_session=False,
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    if updated:
+        conversation.messages += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        conversation.updatedAt = now
+        conversation_cache.set(conversation.id, conversation)
+    else:
+        conversation_cache.delete(conversation.id)
+
+
+def delete_conversation(db: Session, conversation: Conversation) -> None:
+    db.query(ChatMessage).filter(ChatMessage.conversationId == conversation.id).delete(synchronize_session=False)
+    db.query(ChatConversation).filter(ChatConversation.id == conversation.id).delete(synchronize_session=False)
+    db.commit()
+    conversation_cache.delete(conversation.id)
+
+
+def purge_expired_conversations(db: Session, ttl_days: int | None = None) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=ttl_days if ttl_days is not None else settings.chat_conversation_ttl_days)
+    expired = db.query(ChatConversation.id).filter(ChatConversation.updatedAt < cutoff)
+    # Explicit child delete: SQLite does not enforce ON DELETE CASCADE by default.
+    db.query(ChatMessage).filter(ChatMessage.conversationId.in_(expired.scalar_subquery())).delete(
+        synchronize_session=False
+    )
+    count = db.query(ChatConversation).filter(ChatConversation.updatedAt < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+
+def _maybe_purge(db: Session) -> None:
+    global _last_purge
+    if time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = time.monotonic()
+    purge_expired_conversations(db)
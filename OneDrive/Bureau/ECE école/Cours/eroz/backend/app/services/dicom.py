@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import io
+import math
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
+
+import numpy as np
+import pydicom
+from pydicom.multival import MultiValue
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Series, SeriesImage
+from app.services.blobstore import store_bytes
+
+# (center, width) in Hounsfield units
+WINDOW_PRESETS: dict[str, tuple[float, float] | None] = {
+    "auto": None,
+    "brain": (40, 80),
+    "subdural": (75, 215),
+    "stroke": (32, 8),
+    "lung": (-600, 1500),
+    "mediastinum": (50, 350),
+    "abdomen": (40, 400),
+    "liver": (60, 160),
+    "bone": (400, 1800),
+}
+
+MAX_MEMBER_BYTES = 64 * 1024 * 1024
+
+# One renderer pool per API process, shared by every import.
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class DicomImportError(ValueError):
+    pass
+
+
+@dataclass
+class RenderedSlice:
+    sort_key: tuple
+    png: bytes
+
+
+def _first_value(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, MultiValue):
+        value = value[0] if len(value) else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _window_to_uint8(pixels: np.ndarray, center: float, width: float) -> np.ndarray:
+    width = max(width, 1.0)
+    low = center - width / 2
+    scaled = (pixels - low) * (255.0 / width)
+    np.clip(scaled, 0, 255, out=scaled)
+    return scaled.astype(np.uint8)
+
+
+def _auto_window(ds, pixels: np.ndarray) -> tuple[float, float]:
+    center = _first_value(ds.get("WindowCenter"))
+    width = _first_value(ds.get("WindowWidth"))
+    if center is not None and width is not None and width > 0:
+        return center, width
+    low, high = float(pixels.min()), float(pixels.max())
+    return (low + high) / 2, max(high - low, 1.0)
+
+
+def _encode_png(frame: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def render_dicom_bytes(
+    data: bytes, member_name: str, window: tuple[float, float] | None
+) -> list[RenderedSlice]:
+    # Runs in a worker process: parse, rescale, window and encode every frame of one member.
+    try:
+        ds = pydicom.dcmread(io.BytesIO(data), force=True)
+    except Exception:
+        return []
+    if "PixelData" not in ds:
+        return []
+
+    try:
+        pixels = ds.pixel_array
+    except Exception as exc:
+        raise DicomImportError(f"{member_name}: pixel data illisible ({exc})") from exc
+
+    frames = int(ds.get("NumberOfFrames", 1) or 1)
+    samples = int(ds.get("SamplesPerPixel", 1) or 1)
+    if frames == 1:
+        pixels = pixels[np.newaxis, ...]
+
+    instance = _first_value(ds.get("InstanceNumber"))
+    position = ds.get("ImagePositionPatient")
+    location = _first_value(position[2]) if position is not None and len(position) == 3 else None
+    if location is None:
+        location = _first_value(ds.get("SliceLocation"))
+
+    base_key = (
+        instance if instance is not None else math.inf,
+        location if location is not None else math.inf,
+        member_name,
+    )
+
+    rendered: list[RenderedSlice] = []
+    if samples > 1:
+        for idx, frame in enumerate(pixels):
+            rendered.append(RenderedSlice((*base_key, idx), _encode_png(np.asarray(frame, dtype=np.uint8))))
+        return rendered
+
+    slope = _first_value(ds.get("RescaleSlope")) or 1.0
+    intercept = _first_value(ds.get("RescaleIntercept")) or 0.0
+    values = pixels.astype(np.float32)
+    if slope != 1.0:
+        values *= slope
+    if intercept:
+        values += intercept
+
+    center, width = window if window is not None else _auto_window(ds, values)
+    invert = ds.get("PhotometricInterpretation") == "MONOCHROME1"
+
+    for idx, frame in enumerate(values):
+        image = _window_to_uint8(frame, center, width)
+        if invert:
+            image = 255 - image
+        rendered.append(RenderedSlice((*base_key, idx), _encode_png(image)))
+    return rendered
+
+
+def iter_archive_members(archive: BinaryIO) -> Iterator[tuple[str, bytes]]:
+    # zipfile seeks through the central directory, so only one member is held in memory at a time.
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as exc:
+        raise DicomImportError("Archive ZIP invalide") from exc
+
+    with zf:
+        for info in zf.infolist():
+            name = info.filename
+            base = os.path.basename(name)
+            if info.is_dir() or not base or base.startswith(".") or name.startswith("__MACOSX/"):
+                continue
+            if base.upper() == "DICOMDIR":
+                continue
+            if info.file_size > MAX_MEMBER_BYTES:
+                raise DicomImportError(f"{name}: fichier trop volumineux")
+            with zf.open(info) as member:
+                yield name, member.read()
+
+
+def dicom_pool_size() -> int:
+    return settings.dicom_workers or os.cpu_count() or 1
+
+
+def get_dicom_pool() -> ProcessPoolExecutor:
+    # Started on first import rather than at startup: most processes never render DICOM.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=dicom_pool_size())
+        return _pool
+
+
+def shutdown_dicom_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker killed mid-render (e.g. out of memory) breaks the pool for good; the
+    # next import starts a fresh one.
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_with(
+    pool: ProcessPoolExecutor, workers: int, archive: BinaryIO, window: tuple[float, float] | None
+) -> Iterator[RenderedSlice]:
+    max_in_flight = workers * 2
+    pending: deque[Future] = deque()
+    try:
+        for name, data in iter_archive_members(archive):
+            pending.append(pool.submit(render_dicom_bytes, data, name, window))
+            del data
+            # Back-pressure: never queue more raw members than the pool can chew on.
+            while len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def render_dicom_archive(
+    archive: BinaryIO,
+    preset: str = "auto",
+    workers: int | None = None,
+) -> Iterator[RenderedSlice]:
+    if preset not in WINDOW_PRESETS:
+        raise DicomImportError(f"Preset de fenetrage inconnu : {preset}")
+    window = WINDOW_PRESETS[preset]
+
+    if workers:
+        # A private pool of that size, for the ingest benchmark to compare pool sizes.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from _render_with(pool, workers, archive, window)
+        return
+
+    pool = get_dicom_pool()
+    try:
+        yield from _render_with(pool, dicom_pool_size(), archive, window)
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+
+
+def import_dicom_series(
+    db: Session,
+    *,
+    archive: BinaryIO,
+    title: str,
+    description: str | None,
+    difficulty: str,
+    classroom_id: int,
+    created_by_id: int,
+    code: str,
+    preset: str = "auto",
+) -> tuple[Series, int]:
+    slices: list[tuple[tuple, str]] = []
+    try:
+        for rendered in render_dicom_archive(archive, preset=preset):
+            # Identical slices (blank padding, repeated scouts) collapse onto one blob.
+            slices.append((rendered.sort_key, store_bytes(rendered.png, ".png")))
+
+        if not slices:
+            raise DicomImportError("Aucune image DICOM trouvee dans l'archive")
+
+        slices.sort(key=lambda item: item[0])
+
+        series = Series(
+            title=title,
+            description=description,
+            difficulty=difficulty,
+            code=code,
+            classroomId=classroom_id,
+            createdById=created_by_id,
+        )
+        db.add(series)
+        db.flush()
+        db.add_all(
+            SeriesImage(seriesId=series.id, imageUrl=url, orderIndex=order)
+            for order, (_, url) in enumerate(slices)
+        )
+        db.commit()
+    except Exception:
+        # Blobs already written stay unreferenced and are reclaimed by the uploads GC.
+        db.rollback()
+        raise
+
+    db.refresh(series)
+    return series, len(slices)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import Select, and_, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Enrollment, Series, SeriesProgress, User
+from app.services.partitions import all_sessions
+from app.services.sessions import naive_utc
+
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+# Cells a spreadsheet would read as a formula; names and titles are user input.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    value = _value(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _encode_csv(rows: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(map(_csv_value, row) for row in rows)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(columns: list[str], rows: list) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + "\n" for row in rows
+    )
+
+
+def iter_export(statement: Select, format: str, compress: bool) -> Iterator[bytes]:
+    """Stream a query as CSV or NDJSON, one chunk of rows per yielded piece.
+
+    Runs with its own session: the request's one is closed before the body starts.
+    Rows come through a server-side cursor (yield_per), so memory holds one chunk
+    whatever the result size; with compress the bytes are gzipped as they go.
+    """
+    columns = [column.name for column in statement.selected_columns]
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return gzip.compress(data) if gzip is not None else data
+
+    if format == "csv":
+        yield encode(_encode_csv([columns]))
+    db = SessionLocal()
+    try:
+        result = db.connection().execute(
+            statement.execution_options(stream_results=True, yield_per=settings.export_chunk_size)
+        )
+        for rows in result.partitions():
+            data = encode(_encode_csv(rows) if format == "csv" else _encode_ndjson(columns, rows))
+            if data:
+                yield data
+    finally:
+        db.close()
+    if gzip is not None:
+        yield gzip.flush()
+
+
+def gradebook_query(classroom_id: int) -> Select:
+    # One row per enrolled student and series of the class, started or not.
+    return (
+        select(
+            User.id.label("studentId"),
+            User.lastName.label("lastName"),
+            User.firstName.label("firstName"),
+            User.email.label("email"),
+            Series.id.label("seriesId"),
+            Series.title.label("seriesTitle"),
+            SeriesProgress.status.label("status"),
+            SeriesProgress.score.label("score"),
+            SeriesProgress.precision.label("precision"),
+            SeriesProgress.startedAt.label("startedAt"),
+            SeriesProgress.completedAt.label("completedAt"),
+        )
+        .select_from(Enrollment)
+        .join(User, User.id == Enrollment.userId)
+        .join(Series, Series.classroomId == Enrollment.classroomId)
+        .outerjoin(
+            SeriesProgress,
+            and_(SeriesProgress.userId == User.id, SeriesProgress.seriesId == Series.id),
+        )
+        .where(Enrollment.classroomId == classroom_id)
+        .order_by(User.lastName, User.firstName, User.id, Series.id)
+    )
+
+
+def series_results_query(series: Series) -> Select:
+    return (
+        select(
+            User.id.label("studentId"),
+            User.lastName.label("lastName"),
+            User.firstName.label("firstName"),
+            User.email.label("email"),
+            SeriesProgress.status.label("status"),
+            SeriesProgress.score.label("score"),
+            SeriesProgress.precision.label("precision"),
+            SeriesProgress.startedAt.label("startedAt"),
+            SeriesProgress.completedAt.label("completedAt"),
+        )
+        .select_from(Enrollment)
+        .join(User, User.id == Enrollment.userId)
+        .outerjoin(
+            SeriesProgress,
+            and_(SeriesProgress.userId == User.id, SeriesProgress.seriesId == series.id),
+        )
+        .where(Enrollment.classroomId == series.classroomId)
+        .order_by(User.lastName, User.firstName, User.id)
+    )
+
+
+def sessions_query(
+    user_id: int | None = None, since: datetime | None = None, until: datetime | None = None
+) -> Select:
+    # Live and archived sessions: the retention job must not take history out of exports.
+    sessions = all_sessions()
+    statement = select(*sessions.c).order_by(sessions.c.id)
+    if user_id is not None:
+        statement = statement.where(sessions.c.userId == user_id)
+    if since is not None:
+        statement = statement.where(sessions.c.completedAt >= naive_utc(since))
+    if until is not None:
+        statement = statement.where(sessions.c.completedAt < naive_utc(until))
+    return statement
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.core.config import settings
+
+STUDENT = "student"
+STAFF = "staff"
+ALL_ROLES = (STUDENT, STAFF)
+
+STOPWORDS = frozenset(
+    "a au aux ce ces c d de des du en et est il j je l la le les m ma me mes mon moi "
+    "on ou pour qu que qui s se sa son sont ses sur t ta te tes ton tu un une y "
+    "quel quelle quels quelles est ce".split()
+)
+# Longest first; crude, but enough to fold "cree"/"creer"/"creez" or "classe"/"classes".
+SUFFIXES = ("ements", "ement", "ees", "ers", "er", "ez", "es", "ee", "e", "s")
+
+
+@dataclass(frozen=True)
+class FaqEntry:
+    topic: str
+    questions: tuple[str, ...]
+    answer: str
+    roles: tuple[str, ...] = ALL_ROLES
+
+
+@dataclass
+class FaqMatch:
+    entry: FaqEntry
+    score: float
+
+
+# Mirrors PLATFORM_KNOWLEDGE in services.chat: keep both in sync when the UI changes.
+FAQ_ENTRIES = (
+    FaqEntry(
+        topic="rejoindre-classe",
+        questions=(
+            "comment rejoindre une classe",
+            "comment rejoindre un cours",
+            "ou entrer le code de ma classe",
+            "j ai un code de classe que faire",
+            "comment m inscrire dans une classe",
+            "ajouter une classe avec un code",
+        ),
+        answer=(
+            "Va dans **Mes classes**, puis entre le **code** que ton professeur t'a donne. "
+            "La classe apparait ensuite dans ta liste avec ses series d'entrainement."
+        ),
+        roles=(STUDENT,),
+    ),
+    FaqEntry(
+        topic="mes-classes",
+        questions=(
+            "ou voir mes classes",
+            "a quoi sert mes classes",
+            "ou trouver les series de ma classe",
+            "ou sont les exercices de mon professeur",
+        ),
+        answer=(
+            "La page **Mes classes** liste les classes ou tu es inscrit. "
+            "Ouvre une classe pour acceder a ses **series d'entrainement** specifiques."
+        ),
+        roles=(STUDENT,),
+    ),
+    FaqEntry(
+        topic="creer-classe",
+        questions=(
+            "comment creer une classe",
+            "comment creer un cours",
+            "comment ajouter des etudiants a ma classe",
+            "comment generer un code d invitation",
+            "comment inviter des etudiants",
+            "ou trouver le code de ma classe",
+        ),
+        answer=(
+            "Va dans **Gestion des classes** et cree une nouvelle classe. "
+            "Un **code d'invitation** est genere : partage-le aux etudiants, "
+            "ils le saisiront dans **Mes classes** pour rejoindre la classe."
+        ),
+        roles=(STAFF,),
+    ),
+    FaqEntry(
+        topic="resultats-etudiants",
+        questions=(
+            "comment voir les resultats de mes etudiants",
+            "ou voir la liste des etudiants de ma classe",
+            "comment suivre la progression de mes etudiants",
+            "ou sont les notes des etudiants",
+        ),
+        answer=(
+            "Dans **Gestion des classes**, ouvre une classe : tu y verras la **liste des etudiants** "
+            "et leurs **resultats**."
+        ),
+        roles=(STAFF,),
+    ),
+    FaqEntry(
+        topic="creer-serie",
+        questions=(
+            "comment creer une serie",
+            "comment ajouter une serie d entrainement",
+            "comment creer un examen",
+            "comment ajouter des images a une serie",
+            "comment importer un scanner dicom",
+        ),
+        answer=(
+            "Depuis **Gestion des classes**, ouvre ta classe et cree une **serie** d'examen ou "
+            "d'entrainement. Tu peux y ajouter des images ou importer une etude **DICOM** zippee."
+        ),
+        roles=(STAFF,),
+    ),
+    FaqEntry(
+        topic="entrainement",
+        questions=(
+            "comment s entrainer",
+            "comment faire un exercice",
+            "comment commencer une serie",
+            "comment choisir le niveau de difficulte",
+            "comment fonctionne l entrainement",
+            "comment annoter les images",
+            "comment est corrige mon exercice",
+        ),
+        answer=(
+            "Va dans **S'entrainer** : choisis une **serie** (Radio, Scanner, IRM) et un **niveau de difficulte**. "
+            "Annote ensuite les images, tu recois une **correction immediate** par IA."
+        ),
+    ),
+    FaqEntry(
+        topic="progression",
+        questions=(
+            "ou voir ma progression",
+            "ou voir mes statistiques",
+            "ou voir mes stats",
+            "ou voir mon historique",
+            "ou voir mes anciennes sessions",
+            "comment voir mon xp",
+            "ou voir ma precision",
+            "comment gagner de l xp",
+        ),
+        answer=(
+            "La page **Progression** montre l'**historique** de tes sessions et tes statistiques detaillees "
+            "(**XP**, **precision**). Chaque serie terminee te rapporte de l'XP."
+        ),
+    ),
+    FaqEntry(
+        topic="veille",
+        questions=(
+            "ou lire des articles",
+            "ou trouver l actualite medicale",
+            "a quoi sert la veille medicale",
+            "ou voir les news en imagerie",
+        ),
+        answer=(
+            "La **Veille Medicale** propose un flux d'**actualites** et d'articles sur l'imagerie medicale."
+        ),
+    ),
+    FaqEntry(
+        topic="contact",
+        questions=(
+            "comment contacter le support",
+            "comment contacter l equipe",
+            "j ai un probleme avec la plateforme",
+            "comment signaler un bug",
+            "comment joindre l equipe pedagogique",
+        ),
+        answer=(
+            "Utilise la page **Nous contacter** pour joindre le **support** ou l'**equipe pedagogique**."
+        ),
+    ),
+    FaqEntry(
+        topic="accueil",
+        questions=(
+            "a quoi sert la page d accueil",
+            "ou est le tableau de bord",
+            "comment revenir a l accueil",
+        ),
+        answer="L'**Accueil** donne une vue d'ensemble et un **acces rapide** aux principales pages d'Eroz.",
+    ),
+)
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def _stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def _terms(text: str) -> list[str]:
+    words = [_stem(word) for word in normalize_text(text).split() if word not in STOPWORDS]
+    # Bigrams keep "creer classe" apart from "rejoindre classe".
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class FaqIndex:
+    """TF-IDF matrix over every FAQ phrasing, scored with one mat-vec per query."""
+
+    def __init__(self, entries: tuple[FaqEntry, ...]):
+        self.entries = entries
+        documents: list[list[str]] = []
+        self.row_entry: list[int] = []
+        for index, entry in enumerate(entries):
+            for text in (*entry.questions, entry.answer):
+                documents.append(_terms(text))
+                self.row_entry.append(index)
+
+        document_frequency = Counter(term for terms in documents for term in set(terms))
+        self.vocabulary = {term: column for column, term in enumerate(sorted(document_frequency))}
+        self.idf = np.array(
+            [math.log((1 + len(documents)) / (1 + document_frequency[term])) + 1 for term in sorted(document_frequency)],
+            dtype=np.float32,
+        )
+        self.max_idf = float(self.idf.max())
+        self.matrix = np.vstack([self._vector(terms) for terms in documents])
+        self._row_entry = np.array(self.row_entry)
+
+    def _vector(self, terms: list[str]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        unknown = 0.0
+        for term, count in Counter(terms).items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = 1 + math.log(count)
+            else:
+                unknown += ((1 + math.log(count)) * self.max_idf) ** 2
+        vector *= self.idf
+        # Unknown words still count towards the norm: a medical question that shares one
+        # word with an FAQ must not score like an exact match.
+        norm = math.sqrt(float(vector @ vector) + unknown)
+        return vector / norm if norm else vector
+
+    def search(self, text: str, role: str, limit: int = 3) -> list[FaqMatch]:
+        query = self._vector(_terms(text))
+        if not query.any():
+            return []
+        scores = self.matrix @ query
+        # Best phrasing per entry.
+        best = np.zeros(len(self.entries), dtype=np.float32)
+        np.maximum.at(best, self._row_entry, scores)
+        matches = []
+        for index in np.argsort(-best):
+            if best[index] <= 0 or len(matches) >= limit:
+                break
+            entry = self.entries[index]
+            if role in entry.roles:
+                matches.append(FaqMatch(entry=entry, score=float(best[index])))
+        return matches
+
+
+faq_index = FaqIndex(FAQ_ENTRIES)
+faq_stats = {"direct": 0, "augmented": 0, "miss": 0}
+
+
+@dataclass
+class FaqResult:
+    answer: str | None = None
+    knowledge: str | None = None
+
+
+def lookup_faq(question: str, role: str) -> FaqResult:
+    """Direct answer for confident matches, prompt snippets for plausible ones, else nothing."""
+    matches = faq_index.search(question, role)
+    if matches and matches[0].score >= settings.faq_answer_threshold:
+        faq_stats["direct"] += 1
+        return FaqResult(answer=matches[0].entry.answer)
+    snippets = [match.entry.answer for match in matches if match.score >= settings.faq_snippet_threshold]
+    if snippets:
+        faq_stats["augmented"] += 1
+        return FaqResult(
+            knowledge="Extraits de la documentation Eroz :\n" + "\n".join(f"- {snippet}" for snippet in snippets)
+        )
+    faq_stats["miss"] += 1
+    return FaqResult()
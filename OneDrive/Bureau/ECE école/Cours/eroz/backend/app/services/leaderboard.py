@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, insort
+
+from sqlalchemy.orm import Session
+
+from app.models import Enrollment, User, UserStats
+
+GLOBAL = "global"
+
+
+class Ranking:
+    """Users of one scope kept sorted by XP descending, then id: a plain sorted list.
+
+    Rank lookups are a binary search; an XP change is one delete and one insert, which
+    are memmoves of pointers and stay cheap at the sizes a single school reaches.
+    """
+
+    def __init__(self):
+        self._keys: list[tuple[int, int]] = []
+        self._xp: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._xp
+
+    def set(self, user_id: int, xp: int) -> None:
+        old = self._xp.get(user_id)
+        if old == xp:
+            return
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+        self._xp[user_id] = xp
+        insort(self._keys, (-xp, user_id))
+
+    def remove(self, user_id: int) -> None:
+        old = self._xp.pop(user_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+
+    def rank(self, user_id: int) -> int | None:
+        # Competition ranking: users with equal XP share a rank.
+        xp = self._xp.get(user_id)
+        if xp is None:
+            return None
+        return bisect_left(self._keys, (-xp,)) + 1
+
+    def xp(self, user_id: int) -> int | None:
+        return self._xp.get(user_id)
+
+    def user_ids(self) -> list[int]:
+        return list(self._xp)
+
+    def top(self, limit: int) -> list[tuple[int, int, int]]:
+        entries = []
+        for neg_xp, user_id in self._keys[:limit]:
+            entries.append((bisect_left(self._keys, (neg_xp,)) + 1, user_id, -neg_xp))
+        return entries
+
+
+class Leaderboards:
+    """Global and per-classroom XP rankings of students, held in process memory.
+
+    Rebuilt from the database at startup and updated by the routes that change XP,
+    enrollments or roles. Each API process keeps its own copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._global = Ranking()
+        self._classes: dict[int, Ranking] = {}
+        self._enrollments: dict[int, set[int]] = {}
+
+    def rebuild(self, db: Session) -> None:
+        students = (
+            db.query(User.id, UserStats.totalXp)
+            .outerjoin(UserStats, UserStats.userId == User.id)
+            .filter(User.role == "STUDENT")
+            .all()
+        )
+        enrollments = db.query(Enrollment.userId, Enrollment.classroomId).all()
+
+        ranking = Ranking()
+        xp = {user_id: total or 0 for user_id, total in students}
+        for user_id, total in xp.items():
+            ranking.set(user_id, total)
+        classes: dict[int, Ranking] = {}
+        members: dict[int, set[int]] = {}
+        for user_id, classroom_id in enrollments:
+            if user_id in xp:
+                classes.setdefault(classroom_id, Ranking()).set(user_id, xp[user_id])
+                members.setdefault(user_id, set()).add(classroom_id)
+
+        with self._lock:
+            self._global, self._classes, self._enrollments = ranking, classes, members
+
+    def set_xp(self, user_id: int, xp: int) -> None:
+        with self._lock:
+            if user_id not in self._global:
+                return  # not a student
+            self._global.set(user_id, xp)
+            for classroom_id in self._enrollments.get(user_id, ()):
+                self._classes.setdefault(classroom_id, Ranking()).set(user_id, xp)
+
+    def enroll(self, user_id: int, classroom_id: int) -> None:
+        with self._lock:
+            xp = self._global.xp(user_id)
+            if xp is None:
+                return
+            self._enrollments.setdefault(user_id, set()).add(classroom_id)
+            self._classes.setdefault(classroom_id, Ranking()).set(user_id, xp)
+
+    def remove_classroom(self, classroom_id: int) -> None:
+        with self._lock:
+            ranking = self._classes.pop(classroom_id, None)
+            for user_id in ranking.user_ids() if ranking else ():
+                self._enrollments.get(user_id, set()).discard(classroom_id)
+
+    def add_student(self, user_id: int, xp: int, classroom_ids: list[int]) -> None:
+        with self._lock:
+            self._global.set(user_id, xp)
+            self._enrollments[user_id] = set(classroom_ids)
+            for classroom_id in classroom_ids:
+                self._classes.setdefault(classroom_id, Ranking()).set(user_id, xp)
+
+    def remove_user(self, user_id: int) -> None:
+        with self._lock:
+            self._global.remove(user_id)
+            for classroom_id in self._enrollments.pop(user_id, ()):
+                ranking = self._classes.get(classroom_id)
+                if ranking is not None:
+                    ranking.remove(user_id)
+
+    def is_member(self, user_id: int, classroom_id: int) -> bool:
+        with self._lock:
+            return classroom_id in self._enrollments.get(user_id, ())
+
+    def standings(self, scope: int | str, user_id: int, limit: int) -> tuple[int, list, int | None, int | None]:
+        # (size, top entries, my rank, my xp), read under one lock so they agree.
+        with self._lock:
+            ranking = self._global if scope == GLOBAL else self._classes.get(scope, Ranking())
+            return len(ranking), ranking.top(limit), ranking.rank(user_id), ranking.xp(user_id)
+
+
+leaderboards = Leaderboards()
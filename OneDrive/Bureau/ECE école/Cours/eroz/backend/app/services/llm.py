@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+from groq import APIStatusError, AsyncGroq
+
+from app.core.config import settings
+
+_client: AsyncGroq | None = None
+
+
+def get_llm_client() -> AsyncGroq:
+    # One client per process: its connection pool keeps TLS sessions to the LLM alive
+    # between chat messages instead of handshaking on every call.
+    global _client
+    if _client is None:
+        timeout = httpx.Timeout(settings.groq_timeout_seconds, connect=settings.groq_connect_timeout_seconds)
+        _client = AsyncGroq(
+            api_key=settings.groq_api_key,
+            base_url=settings.groq_base_url or None,
+            timeout=timeout,
+            # Connection errors, 408/409/429 and 5xx are retried with jittered exponential
+            # backoff (Retry-After wins when the server sends one).
+            max_retries=settings.groq_max_retries,
+            http_client=httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.groq_max_connections,
+                    max_keepalive_connections=settings.groq_max_connections,
+                    keepalive_expiry=60,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+class LLMUnavailable(RuntimeError):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    # A request the provider rejected as invalid says nothing about its health.
+    if isinstance(exc, APIStatusError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return isinstance(exc, Exception)
+
+
+class Bulkhead:
+    """At most `limit` concurrent LLM calls, with a bounded queue of waiters behind them."""
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore, self._loop = asyncio.Semaphore(self.limit), loop
+        return self._semaphore
+
+    async def acquire(self) -> None:
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.queue_size:
+            self.rejected += 1
+            raise LLMUnavailable("busy", retry_after=1)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMUnavailable("busy", retry_after=1) from None
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._get_semaphore().release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreaker:
+    """Fails fast after `threshold` consecutive upstream failures, then lets one probe through."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def check(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return
+        self.short_circuited += 1
+        remaining = self.cooldown - (time.monotonic() - self.opened_at)
+        raise LLMUnavailable("circuit-open", retry_after=max(1, math.ceil(remaining)))
+
+    def record(self, error: BaseException | None) -> None:
+        was_probe, self.probing = self.probing, False
+        if error is None:
+            self.failures, self.opened_at = 0, None
+        elif is_upstream_failure(error):
+            self.failures += 1
+            if was_probe or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutiveFailures": self.failures, "shortCircuited": self.short_circuited}
+
+
+bulkhead = Bulkhead(settings.chat_max_concurrency, settings.chat_max_queue, settings.chat_queue_timeout_seconds)
+breaker = CircuitBreaker(settings.chat_breaker_failures, settings.chat_breaker_cooldown_seconds)
+
+
+async def acquire_llm() -> None:
+    breaker.check()
+    try:
+        await bulkhead.acquire()
+    except BaseException:
+        # A rejected half-open probe must not leave the breaker waiting forever.
+        breaker.probing = False
+        raise
+
+
+def release_llm(error: BaseException | None = None) -> None:
+    bulkhead.release()
+    if isinstance(error, asyncio.CancelledError):
+        # The caller went away: no verdict on the upstream either way.
+        breaker.probing = False
+    else:
+        breaker.record(error)
+
+
+@asynccontextmanager
+async def llm_slot() -> AsyncIterator[None]:
+    await acquire_llm()
+    try:
+        yield
+    except BaseException as exc:
+        release_llm(exc)
+        raise
+    release_llm()
+
+
+def guard_stats() -> dict:
+    return {"bulkhead": bulkhead.stats(), "circuitBreaker": breaker.stats()}
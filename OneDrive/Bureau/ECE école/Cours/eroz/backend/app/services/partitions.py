@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+
+from sqlalchemy import Connection, Engine, select, text, union_all
+from sqlalchemy.schema import CreateColumn
+
+from app.core.config import settings
+from app.models import TrainingSession, TrainingSessionArchive
+
+logger = logging.getLogger(__name__)
+
+TABLE = TrainingSession.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+SESSION_FIELDS = [column.name for column in TrainingSession.__table__.columns]
+# pg_advisory_xact_lock key: API processes starting together create partitions one at a time.
+_LOCK_KEY = 0x7261696E
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def all_sessions():
+    # Live and archived sessions, for the rebuilds that must see the whole history.
+    live = select(*(TrainingSession.__table__.c[name] for name in SESSION_FIELDS))
+    archived = select(*(TrainingSessionArchive.__table__.c[name] for name in SESSION_FIELDS))
+    return union_all(live, archived).subquery("all_sessions")
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name)"), {"name": TABLE}
+    ).first() is not None
+
+
+def _create_parent(conn: Connection) -> None:
+    # The model's columns and foreign keys, with completedAt added to the primary key as
+    # PostgreSQL requires for a partition key. Rows outside every monthly partition land
+    # in the DEFAULT one until ensure_partitions moves them.
+    table = TrainingSession.__table__
+    compiler = conn.dialect.ddl_compiler(conn.dialect, None)
+    quote = conn.dialect.identifier_preparer.quote
+    elements = [compiler.process(CreateColumn(column)) for column in table.columns]
+    elements += [compiler.process(constraint) for constraint in table.foreign_key_constraints]
+    elements.append(f"PRIMARY KEY ({quote('id')}, {quote('completedAt')})")
+    body = ",\n    ".join(elements)
+    conn.execute(text(f"CREATE TABLE {TABLE} (\n    {body}\n) PARTITION BY RANGE ({quote('completedAt')})"))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+
+def existing_partitions(conn: Connection) -> set[date]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:name)"
+        ),
+        {"name": TABLE},
+    )
+    prefix = f"{TABLE}_p"
+    return {
+        datetime.strptime(name[len(prefix):], "%Y%m").date()
+        for (name,) in rows
+        if name.startswith(prefix) and name[len(prefix):].isdigit()
+    }
+
+
+def _create_partition(conn: Connection, month: date) -> int:
+    # Built detached, filled with the month's rows from the DEFAULT partition, then
+    # attached: ATTACH creates the partition's copy of every index on the parent.
+    name, end = partition_name(month), add_months(month, 1)
+    completed = conn.dialect.identifier_preparer.quote("completedAt")
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE {completed} >= :start AND {completed} < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": month, "end": end},
+    ).rowcount
+    conn.execute(
+        text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{end}')")
+    )
+    return moved
+
+
+def ensure_partitions(conn: Connection, months: set[date] = frozenset()) -> list[date]:
+    """Create the monthly partitions still missing on a partitioned training_sessions.
+
+    Covers the current month, SESSIONS_PARTITIONS_AHEAD months ahead, any month that
+    has rows in the DEFAULT partition and the extra months given. Runs in the caller's
+    transaction.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    current = month_start(datetime.utcnow())
+    wanted = {add_months(current, i) for i in range(settings.sessions_partitions_ahead + 1)} | set(months)
+    completed = conn.dialect.identifier_preparer.quote("completedAt")
+    wanted |= {
+        month_start(row[0])
+        for row in conn.execute(text(f"SELECT DISTINCT date_trunc('month', {completed}) FROM {DEFAULT_PARTITION}"))
+    }
+    created = sorted(wanted - existing_partitions(conn))
+    for month in created:
+        moved = _create_partition(conn, month)
+        logger.info("Created partition %s (%d rows moved from default)", partition_name(month), moved)
+    return created
+
+
+def prepare_partitioned_table(engine: Engine) -> bool:
+    # Before create_all: on a new PostgreSQL database training_sessions is created
+    # partitioned, and create_all then leaves it alone. Existing tables are untouched;
+    # app.commands.partition_sessions --convert migrates them.
+    if engine.dialect.name != "postgresql" or not settings.sessions_partitioning:
+        return False
+    with engine.begin() as conn:
+        if _exists(conn, TABLE):
+            return False
+        _create_parent(conn)
+    return True
+
+
+def maintain_partitions(engine: Engine) -> list[date]:
+    # Not gated on SESSIONS_PARTITIONING: a table that is already partitioned still needs
+    # its upcoming months, or every new row lands in the DEFAULT partition.
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+        return ensure_partitions(conn)
+
+
+def convert_to_partitioned(conn: Connection) -> int:
+    """Rebuild an existing plain training_sessions as a partitioned table, in one transaction.
+
+    The old table is renamed, every month it covers gets its partition, rows are copied
+    across and the id sequence continues where it was. Returns the rows copied.
+    """
+    old = f"{TABLE}_unpartitioned"
+    conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+    sequence = conn.execute(text(f"SELECT pg_get_serial_sequence('{TABLE}', 'id')")).scalar()
+    conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {old}"))
+    conn.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {TABLE}_pkey TO {old}_pkey"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {old}_id_seq"))
+    for index in TrainingSession.__table__.indexes:
+        conn.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+
+    _create_parent(conn)
+    completed = conn.dialect.identifier_preparer.quote("completedAt")
+    months = {
+        month_start(row[0])
+        for row in conn.execute(text(f"SELECT DISTINCT date_trunc('month', {completed}) FROM {old}"))
+    }
+    ensure_partitions(conn, months)
+    columns = ", ".join(conn.dialect.identifier_preparer.quote(name) for name in SESSION_FIELDS)
+    copied = conn.execute(text(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {old}")).rowcount
+    conn.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+            f"(SELECT coalesce(max(id), 0) + 1 FROM {old}), false)"
+        )
+    )
+    conn.execute(text(f"DROP TABLE {old}"))
+    for index in TrainingSession.__table__.indexes:
+        index.create(bind=conn)
+    return copied
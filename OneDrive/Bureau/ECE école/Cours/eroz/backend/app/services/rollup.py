@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import TrainingSession, UserDailyStats
+from app.services.activity import local_day_expr, resolve_timezone
+from app.services.partitions import all_sessions
+
+ROLLUP_MAX_DAYS = 3660
+ROLLUP_MAX_WINDOW = 90
+COUNTERS = ("sessions", "xp", "precisionSum", "durationSum")
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class InvalidRange(ValueError):
+    pass
+
+
+def rollup_day(completed_at: datetime) -> date:
+    # Rollup days are fixed to ACTIVITY_TIMEZONE: one row per user per local day.
+    zone = resolve_timezone(None)
+    return completed_at.replace(tzinfo=timezone.utc).astimezone(zone).date()
+
+
+def rollup_today() -> date:
+    return datetime.now(resolve_timezone(None)).date()
+
+
+def record_session(db: Session, session: TrainingSession) -> None:
+    # Runs inside the caller's transaction. A single upsert, so two submissions landing
+    # on the same day add up instead of racing on the unique (userId, day) row.
+    values = {
+        "userId": session.userId,
+        "day": rollup_day(session.completedAt),
+        "sessions": 1,
+        "xp": session.xpEarned,
+        "precisionSum": session.precision,
+        "durationSum": session.duration,
+    }
+    upsert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if upsert is None:
+        _add_without_upsert(db, values)
+        return
+    statement = upsert(UserDailyStats).values(**values)
+    excluded = statement.excluded
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[UserDailyStats.userId, UserDailyStats.day],
+            set_={name: getattr(UserDailyStats, name) + getattr(excluded, name) for name in COUNTERS},
+        )
+    )
+
+
+def _add_without_upsert(db: Session, values: dict) -> None:
+    # Databases without ON CONFLICT: add to the (userId, day) row, or insert it. An insert
+    # that loses the race to a concurrent one hits the unique key and adds instead.
+    add = (
+        update(UserDailyStats)
+        .where(UserDailyStats.userId == values["userId"], UserDailyStats.day == values["day"])
+        .values({name: getattr(UserDailyStats, name) + values[name] for name in COUNTERS})
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(add).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(UserDailyStats).values(**values))
+    except IntegrityError:
+        db.execute(add)
+
+
+def rebuild_daily_stats(db: Session, user_id: int | None = None) -> int:
+    # Recomputes the rollup from live and archived sessions in one INSERT ... SELECT ...
+    # GROUP BY; the caller commits.
+    sessions = all_sessions()
+    day = local_day_expr(db, resolve_timezone(None), datetime.utcnow(), sessions.c.completedAt).label("day")
+    source = select(
+        sessions.c.userId,
+        day,
+        func.count(),
+        func.coalesce(func.sum(sessions.c.xpEarned), 0),
+        func.coalesce(func.sum(sessions.c.precision), 0),
+        func.coalesce(func.sum(sessions.c.duration), 0),
+    ).group_by(sessions.c.userId, day)
+    cleared = delete(UserDailyStats)
+    if user_id is not None:
+        source = source.where(sessions.c.userId == user_id)
+        cleared = cleared.where(UserDailyStats.userId == user_id)
+
+    db.execute(cleared)
+    result = db.execute(
+        insert(UserDailyStats).from_select(
+            ["userId", "day", "sessions", "xp", "precisionSum", "durationSum"], source
+        )
+    )
+    return result.rowcount
+
+
+def check_range(start: date, end: date) -> None:
+    if start > end:
+        raise InvalidRange("since must not be after until")
+    if (end - start).days >= ROLLUP_MAX_DAYS:
+        raise InvalidRange(f"range is limited to {ROLLUP_MAX_DAYS} days")
+
+
+def _daily(db: Session, user_id: int, start: date, end: date, *columns) -> np.ndarray:
+    # Dense (days, len(columns)) matrix, zero on days without a rollup row.
+    values = np.zeros(((end - start).days + 1, len(columns)))
+    rows = (
+        db.query(UserDailyStats.day, *columns)
+        .filter(UserDailyStats.userId == user_id)
+        .filter(UserDailyStats.day >= start, UserDailyStats.day <= end)
+        .all()
+    )
+    for day, *row in rows:
+        values[(day - start).days] = row
+    return values
+
+
+def xp_curve(db: Session, user_id: int, start: date, end: date) -> tuple[list[date], np.ndarray, np.ndarray]:
+    check_range(start, end)
+    before = (
+        db.query(func.coalesce(func.sum(UserDailyStats.xp), 0))
+        .filter(UserDailyStats.userId == user_id, UserDailyStats.day < start)
+        .scalar()
+    )
+    daily = _daily(db, user_id, start, end, UserDailyStats.xp)[:, 0].astype(np.int64)
+    days = [start + timedelta(days=i) for i in range(len(daily))]
+    return days, daily, before + np.cumsum(daily)
+
+
+def precision_trend(
+    db: Session, user_id: int, start: date, end: date, window: int
+) -> tuple[list[date], np.ndarray, np.ndarray]:
+    # Session-weighted moving average over the trailing `window` days; NaN where the
+    # window holds no session.
+    check_range(start, end)
+    if not 1 <= window <= ROLLUP_MAX_WINDOW:
+        raise InvalidRange(f"window must be between 1 and {ROLLUP_MAX_WINDOW}")
+    lead = start - timedelta(days=window - 1)
+    daily = _daily(db, user_id, lead, end, UserDailyStats.sessions, UserDailyStats.precisionSum)
+    totals = np.vstack([np.zeros((1, 2)), np.cumsum(daily, axis=0)])
+    windowed = totals[window:] - totals[:-window]
+    sessions, precision_sum = windowed[:, 0], windowed[:, 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = np.where(sessions > 0, precision_sum / sessions, np.nan)
+    days = [start + timedelta(days=i) for i in range(len(average))]
+    return days, sessions.astype(np.int64), average
@@ -17,6 +17,7 @@ from app.models import (
     User,
     UserStats,
 )
+from app.services.rollup import rebuild_daily_stats
 
 DIFFICULTIES = {
     "EASY": {"name": "EASY", "multiplier": 1.0},
@@ -103,6 +104,8 @@ def create_sessions_and_stats(
         db.add(session)
         sessions.append(session)
 
+    db.flush()
+    rebuild_daily_stats(db, user.id)
     db.commit()
 
     total_sessions = len(sessions)
@@ -165,6 +168,7 @@ def rebuild_stats_from_sessions(db: Session, user: User):
     stats.averageTime = average_time
     stats.currentStreak = streak
     stats.lastActivityAt = last_activity
+    rebuild_daily_stats(db, user.id)
     db.commit()
 
 
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime, time, timezone
+from typing import Sequence
+
+from sqlalchemy import Row, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import TrainingSession
+from app.services.partitions import add_months, month_start
+
+# Only what TrainingSessionResponse serializes: rows come back as plain tuples instead
+# of tracked ORM entities.
+SESSION_COLUMNS = (
+    TrainingSession.id,
+    TrainingSession.userId,
+    TrainingSession.difficulty,
+    TrainingSession.precision,
+    TrainingSession.duration,
+    TrainingSession.totalImages,
+    TrainingSession.correctAnswers,
+    TrainingSession.baseScore,
+    TrainingSession.multiplier,
+    TrainingSession.xpEarned,
+    TrainingSession.completedAt,
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(completed_at: datetime, session_id: int) -> str:
+    raw = f"{completed_at.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        completed_at, session_id = raw.split("|")
+        return datetime.fromisoformat(completed_at), int(session_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def naive_utc(value: datetime) -> datetime:
+    # completedAt is stored as naive UTC.
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def history_start() -> datetime | None:
+    # Default lower bound of history listings when training_sessions is partitioned: the
+    # last SESSIONS_HISTORY_MONTHS calendar months, so PostgreSQL only visits those
+    # partitions. Older sessions need ?since=. Unpartitioned, the (userId, completedAt, id)
+    # index and the page limit already bound the scan, so the whole history is listed.
+    if not settings.sessions_partitioning or not settings.sessions_history_months:
+        return None
+    first = add_months(month_start(datetime.utcnow()), 1 - settings.sessions_history_months)
+    return datetime.combine(first, time.min)
+
+
+def session_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    *,
+    cursor: str | None = None,
+    difficulty: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> tuple[Sequence[Row], str | None]:
+    # Keyset pagination on (completedAt, id), newest first. Every page is an index range
+    # scan on (userId, completedAt, id) that stops after limit + 1 rows, however deep it is.
+    query = db.query(*SESSION_COLUMNS).filter(TrainingSession.userId == user_id)
+    if difficulty:
+        query = query.filter(TrainingSession.difficulty == difficulty)
+    since = naive_utc(since) if since else history_start()
+    if since:
+        query = query.filter(TrainingSession.completedAt >= since)
+    if until:
+        query = query.filter(TrainingSession.completedAt < naive_utc(until))
+    if cursor:
+        completed_at, session_id = decode_cursor(cursor)
+        # A row-value comparison, so PostgreSQL turns it into a single index range bound.
+        query = query.filter(
+            tuple_(TrainingSession.completedAt, TrainingSession.id) < tuple_(completed_at, session_id)
+        )
+
+    rows = (
+        query.order_by(TrainingSession.completedAt.desc(), TrainingSession.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.completedAt, last.id)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import numpy as np
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import UserStats
+from app.services.partitions import all_sessions
+from app.services.seed import calculate_level
+
+STAT_FIELDS = ("totalXp", "level", "totalSessions", "averageScore", "averageTime", "currentStreak", "lastActivityAt")
+
+
+@dataclass
+class RebuildReport:
+    users: int = 0
+    sessions: int = 0
+    changed: int = 0
+    inserted: int = 0
+    reset: int = 0
+    fields: Counter = field(default_factory=Counter)
+    samples: list[tuple[int, dict]] = field(default_factory=list)
+
+
+@dataclass
+class _Carry:
+    # Running state of the user whose sessions continue into the next chunk.
+    user_id: int
+    count: float
+    xp: float
+    precision: float
+    duration: float
+    last_day: np.datetime64
+    run: int
+    last_at: datetime
+
+
+def _chunk_stats(
+    users: np.ndarray,
+    days: np.ndarray,
+    xp: np.ndarray,
+    precision: np.ndarray,
+    duration: np.ndarray,
+    carry: _Carry | None,
+) -> dict[str, np.ndarray]:
+    """Per-user sums and trailing streak for one chunk of rows ordered by (user, time).
+
+    A carried user is prepended as one weighted pseudo-row, so a user split across
+    chunks folds into the same vectorized pass.
+    """
+    count = np.ones(users.size)
+    if carry is not None:
+        users = np.concatenate([[carry.user_id], users])
+        days = np.concatenate([[carry.last_day], days])
+        count = np.concatenate([[carry.count], count])
+        xp = np.concatenate([[carry.xp], xp])
+        precision = np.concatenate([[carry.precision], precision])
+        duration = np.concatenate([[carry.duration], duration])
+
+    n = users.size
+    index = np.arange(n)
+    start = np.ones(n, dtype=bool)
+    start[1:] = users[1:] != users[:-1]
+    segment = np.cumsum(start) - 1
+    starts = index[start]
+    ends = np.append(starts[1:], n) - 1
+
+    # Streak = distinct days in the run that ends on the user's last active day.
+    gap = np.zeros(n, dtype=np.int64)
+    gap[1:] = (days[1:] - days[:-1]).astype(np.int64)
+    new_day = start | (gap >= 1)
+    reset = start | (gap > 1)
+    distinct = np.cumsum(new_day)
+    last_reset = np.maximum.accumulate(np.where(reset, index, 0))
+    run = distinct[ends] - distinct[last_reset[ends]] + 1
+    if carry is not None and last_reset[ends[0]] == 0:
+        run[0] += carry.run - 1
+
+    return {
+        "users": users[starts],
+        "count": np.bincount(segment, weights=count),
+        "xp": np.bincount(segment, weights=xp),
+        "precision": np.bincount(segment, weights=precision),
+        "duration": np.bincount(segment, weights=duration),
+        "last_day": days[ends],
+        "run": run,
+        "ends": ends - (1 if carry is not None else 0),
+    }
+
+
+def _stat_rows(chunks: Iterable[list], report: RebuildReport) -> Iterator[dict]:
+    # Yields one computed UserStats row per user; holds back only the chunk's last user.
+    carry: _Carry | None = None
+    for rows in chunks:
+        report.sessions += len(rows)
+        user_ids, completed, xp, precision, duration = zip(*rows)
+        completed_at = np.array(completed, dtype="datetime64[us]")
+        stats = _chunk_stats(
+            np.array(user_ids, dtype=np.int64),
+            completed_at.astype("datetime64[D]"),
+            np.array(xp, dtype=np.float64),
+            np.array(precision, dtype=np.float64),
+            np.array(duration, dtype=np.float64),
+            carry,
+        )
+        last = len(stats["users"]) - 1
+        for i in range(last):
+            yield _row(stats, i, completed[stats["ends"][i]] if stats["ends"][i] >= 0 else carry.last_at)
+        end = stats["ends"][last]
+        carry = _Carry(
+            user_id=int(stats["users"][last]),
+            count=stats["count"][last],
+            xp=stats["xp"][last],
+            precision=stats["precision"][last],
+            duration=stats["duration"][last],
+            last_day=stats["last_day"][last],
+            run=int(stats["run"][last]),
+            last_at=completed[end] if end >= 0 else carry.last_at,
+        )
+    if carry is not None:
+        yield {
+            "userId": carry.user_id,
+            **_values(carry.count, carry.xp, carry.precision, carry.duration, carry.run, carry.last_at),
+        }
+
+
+def _row(stats: dict[str, np.ndarray], i: int, last_at: datetime) -> dict:
+    return {
+        "userId": int(stats["users"][i]),
+        **_values(
+            stats["count"][i],
+            stats["xp"][i],
+            stats["precision"][i],
+            stats["duration"][i],
+            int(stats["run"][i]),
+            last_at,
+        ),
+    }
+
+
+def _values(count: float, xp: float, precision: float, duration: float, run: int, last_at: datetime) -> dict:
+    total_xp = int(round(xp))
+    return {
+        "totalXp": total_xp,
+        "level": calculate_level(total_xp),
+        "totalSessions": int(count),
+        "averageScore": round(float(precision / count), 2),
+        "averageTime": int(round(duration / count)),
+        "currentStreak": run,
+        "lastActivityAt": last_at,
+    }
+
+
+def _differs(field_name: str, current, computed) -> bool:
+    if field_name == "averageScore":
+        return abs((current or 0) - computed) > 0.005
+    return current != computed
+
+
+def _write(db: Session, rows: list[dict], report: RebuildReport, dry_run: bool, sample_size: int) -> None:
+    existing = {
+        row.userId: row
+        for row in db.query(UserStats.id, UserStats.userId, *(getattr(UserStats, f) for f in STAT_FIELDS))
+        .filter(UserStats.userId.in_([row["userId"] for row in rows]))
+    }
+    updates, inserts = [], []
+    for row in rows:
+        current = existing.get(row["userId"])
+        if current is None:
+            inserts.append(row)
+            continue
+        changed = {f: (getattr(current, f), row[f]) for f in STAT_FIELDS if _differs(f, getattr(current, f), row[f])}
+        if changed:
+            report.changed += 1
+            report.fields.update(changed.keys())
+            if len(report.samples) < sample_size:
+                report.samples.append((row["userId"], changed))
+            updates.append({"id": current.id, **row})
+    report.inserted += len(inserts)
+    if dry_run:
+        return
+    if updates:
+        db.execute(update(UserStats), updates)
+    if inserts:
+        db.execute(insert(UserStats), inserts)
+
+
+def rebuild_all_stats(
+    db: Session,
+    *,
+    chunk_size: int = 50_000,
+    write_batch: int = 1000,
+    dry_run: bool = False,
+    sample_size: int = 20,
+    user_ids: list[int] | None = None,
+) -> RebuildReport:
+    """Recompute every UserStats row from live and archived sessions in one streamed pass.
+
+    Sessions are read in (userId, completedAt) order through a server-side cursor,
+    chunk_size rows at a time, so memory stays flat whatever the table size. Writes
+    go out in bulk on the same connection and the caller commits once.
+    """
+    report = RebuildReport()
+    sessions = all_sessions()
+    statement = (
+        select(
+            sessions.c.userId,
+            sessions.c.completedAt,
+            sessions.c.xpEarned,
+            sessions.c.precision,
+            sessions.c.duration,
+        )
+        .order_by(sessions.c.userId, sessions.c.completedAt)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    if user_ids is not None:
+        statement = statement.where(sessions.c.userId.in_(user_ids))
+
+    # Core rows on the session's own connection: no ORM row processing, and the
+    # bulk writes below share the transaction the cursor lives in.
+    chunks = db.connection().execute(statement).partitions()
+    seen: set[int] = set()
+    pending: list[dict] = []
+    for row in _stat_rows(chunks, report):
+        report.users += 1
+        seen.add(row["userId"])
+        pending.append(row)
+        if len(pending) >= write_batch:
+            _write(db, pending, report, dry_run, sample_size)
+            pending = []
+    if pending:
+        _write(db, pending, report, dry_run, sample_size)
+
+    # Stats rows of users without any session go back to their defaults.
+    stale = db.query(UserStats.id, UserStats.userId).filter(
+        (UserStats.totalSessions != 0) | (UserStats.totalXp != 0)
+    )
+    if user_ids is not None:
+        stale = stale.filter(UserStats.userId.in_(user_ids))
+    resets = [
+        {"id": stats_id, "totalXp": 0, "level": 1, "totalSessions": 0, "averageScore": 0, "averageTime": 0,
+         "currentStreak": 0, "lastActivityAt": None}
+        for stats_id, user_id in stale
+        if user_id not in seen
+    ]
+    report.reset = len(resets)
+    if resets and not dry_run:
+        db.execute(update(UserStats), resets)
+    return report
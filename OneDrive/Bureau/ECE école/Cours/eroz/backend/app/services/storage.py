@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import base64
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import jwt
+
+from app.core.config import settings
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+READ_CHUNK = 64 * 1024
+UPLOAD_TOKEN_TYPE = "upload"
+
+
+class StorageError(RuntimeError):
+    pass
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: float
+
+
+@dataclass
+class PresignedUpload:
+    method: str
+    url: str
+    headers: dict[str, str]
+    expiresAt: datetime
+
+
+def _hex_to_b64(sha256_hex: str) -> str:
+    return base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+
+
+class LocalStorage:
+    def __init__(self, root: Path):
+        self.root = root
+        self.staging_dir = root / ".tmp"
+
+    def url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+    def key_for_url(self, url: str) -> str | None:
+        if not url.startswith("/uploads/"):
+            return None
+        key = url.removeprefix("/uploads/")
+        if any(part in {"", ".", ".."} or part.startswith(".") for part in key.split("/")):
+            return None
+        return key
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def touch(self, key: str) -> None:
+        os.utime(self._path(key))
+
+    def put_file(self, path: Path, key: str, content_type: str | None = None) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # staging_dir lives on the same filesystem, so this is an atomic rename.
+        os.replace(path, target)
+
+    def read_head(self, key: str, length: int) -> bytes:
+        with self._path(key).open("rb") as handle:
+            return handle.read(length)
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        with self._path(key).open("rb") as handle:
+            while chunk := handle.read(READ_CHUNK):
+                yield chunk
+
+    def stat(self, key: str) -> StoredObject | None:
+        try:
+            result = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        return StoredObject(key=key, size=result.st_size, modified=result.st_mtime)
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        base = self._path(prefix)
+        if not base.exists():
+            return
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                try:
+                    result = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                key = Path(full).relative_to(self.root).as_posix()
+                yield StoredObject(key=key, size=result.st_size, modified=result.st_mtime)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._path(key).unlink(missing_ok=True)
+
+    def presign_put(self, key: str, *, content_type: str, size: int, sha256: str) -> PresignedUpload:
+        # No object store in front of the disk: hand out a short-lived signed URL on our own
+        # direct-upload route so clients use the same flow as with S3.
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.presign_expires_seconds)
+        token = jwt.encode(
+            {"typ": UPLOAD_TOKEN_TYPE, "key": key, "ct": content_type, "size": size, "sha256": sha256, "exp": expires_at},
+            settings.jwt_secret,
+            algorithm=settings.jwt_algorithm,
+        )
+        return PresignedUpload(
+            method="PUT",
+            url=f"/api/upload/direct/{token}",
+            headers={"Content-Type": content_type},
+            expiresAt=expires_at,
+        )
+
+
+class S3Storage:
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError as exc:
+            raise StorageError("STORAGE_BACKEND=s3 requires boto3") from exc
+
+        if not settings.s3_bucket:
+            raise StorageError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+
+        self._client_error = ClientError
+        self.bucket = settings.s3_bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region,
+            aws_access_key_id=settings.s3_access_key,
+            aws_secret_access_key=settings.s3_secret_key,
+            config=Config(
+                signature_version="s3v4",
+                s3={"addressing_style": "path" if settings.s3_endpoint_url else "auto"},
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
+        )
+        self.public_url = (
+            settings.s3_public_url
+            or f"{(settings.s3_endpoint_url or 'https://s3.amazonaws.com').rstrip('/')}/{self.bucket}"
+        ).rstrip("/")
+        self.staging_dir = Path(tempfile.gettempdir()) / "eroz-staging"
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def key_for_url(self, url: str) -> str | None:
+        prefix = f"{self.public_url}/"
+        return url.removeprefix(prefix) if url.startswith(prefix) else None
+
+    def _head(self, key: str) -> dict | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except self._client_error as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def touch(self, key: str) -> None:
+        # S3 has no utime; an in-place copy refreshes LastModified for the GC grace period.
+        head = self._head(key)
+        if head is None:
+            return
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType", "application/octet-stream"),
+            CacheControl=IMMUTABLE_CACHE,
+        )
+
+    def put_file(self, path: Path, key: str, content_type: str | None = None) -> None:
+        extra = {"CacheControl": IMMUTABLE_CACHE}
+        if content_type:
+            extra["ContentType"] = content_type
+        try:
+            self.client.upload_file(str(path), self.bucket, key, ExtraArgs=extra)
+        finally:
+            path.unlink(missing_ok=True)
+
+    def read_head(self, key: str, length: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}")
+        return response["Body"].read()
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self._client_error as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                raise FileNotFoundError(key) from exc
+            raise
+        yield from response["Body"].iter_chunks(READ_CHUNK)
+
+    def stat(self, key: str) -> StoredObject | None:
+        head = self._head(key)
+        if head is None:
+            return None
+        return StoredObject(key=key, size=head["ContentLength"], modified=head["LastModified"].timestamp())
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                yield StoredObject(key=item["Key"], size=item["Size"], modified=item["LastModified"].timestamp())
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            batch = keys[start : start + 1000]
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+
+    def presign_put(self, key: str, *, content_type: str, size: int, sha256: str) -> PresignedUpload:
+        # Length, type and checksum are all signed, so the store itself rejects any body
+        # that does not match what the API validated.
+        checksum = _hex_to_b64(sha256)
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+                "CacheControl": IMMUTABLE_CACHE,
+            },
+            ExpiresIn=settings.presign_expires_seconds,
+        )
+        return PresignedUpload(
+            method="PUT",
+            url=url,
+            headers={
+                "Content-Type": content_type,
+                "Cache-Control": IMMUTABLE_CACHE,
+                "x-amz-checksum-sha256": checksum,
+            },
+            expiresAt=datetime.utcnow() + timedelta(seconds=settings.presign_expires_seconds),
+        )
+
+
+Storage = LocalStorage | S3Storage
+
+
+@lru_cache
+def get_storage() -> Storage:
+    if settings.storage_backend == "s3":
+        return S3Storage()
+    if settings.storage_backend != "local":
+        raise StorageError(f"Unknown STORAGE_BACKEND: {settings.storage_backend}")
+    return LocalStorage(settings.upload_path)
+
+
+def decode_direct_upload_token(token: str) -> dict:
+    # Signed with the same secret as access tokens, so the type claim tells them apart.
+    claims = jwt.decode(
+        token,
+        settings.jwt_secret,
+        algorithms=[settings.jwt_algorithm],
+        options={"require": ["typ", "key", "ct", "size", "sha256"]},
+    )
+    if claims["typ"] != UPLOAD_TOKEN_TYPE:
+        raise jwt.InvalidTokenError("Not an upload token")
+    return claims
+
+
+def staging_file() -> tuple[int, Path]:
+    staging_dir = get_storage().staging_dir
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=staging_dir)
+    return fd, Path(name)
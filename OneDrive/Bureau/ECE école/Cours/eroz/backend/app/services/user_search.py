@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Sequence
+
+from sqlalchemy import Engine, Row, text, tuple_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.models import User
+from app.models.user import USER_SEARCH_TEXT
+from app.services.sessions import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+ROLES = {"STUDENT", "PROF", "ADMIN"}
+USER_COLUMNS = (User.id, User.firstName, User.lastName, User.email, User.role, User.createdAt)
+
+
+def prepare_search(engine: Engine) -> bool:
+    # Before the startup index pass: the trigram index is only created once pg_trgm exists.
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError:
+        logger.warning("pg_trgm is not available: admin user search will scan the users table")
+        return False
+    return True
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filtered(db: Session, search: str | None, role: str | None) -> Query:
+    query = db.query(*USER_COLUMNS)
+    if role:
+        query = query.filter(User.role == role)
+    # Every word must appear somewhere in "first last email"; each LIKE is answered by the
+    # trigram index on PostgreSQL, so the scan does not grow with the table.
+    for word in (search or "").lower().split():
+        query = query.filter(USER_SEARCH_TEXT.like(f"%{_escape_like(word)}%", escape="\\"))
+    return query
+
+
+def user_page(
+    db: Session,
+    limit: int,
+    *,
+    search: str | None = None,
+    role: str | None = None,
+    cursor: str | None = None,
+) -> tuple[Sequence[Row], str | None]:
+    # Keyset pagination on (createdAt, id), newest first, like the sessions history.
+    query = _filtered(db, search, role)
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        query = query.filter(tuple_(User.createdAt, User.id) < tuple_(created_at, user_id))
+    rows = query.order_by(User.createdAt.desc(), User.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.createdAt, last.id)
+
+
+def count_users(db: Session, *, search: str | None = None, role: str | None = None) -> tuple[int, bool]:
+    """(count, estimated) of the users matching a search.
+
+    PostgreSQL returns the planner's row estimate, which costs a plan and no scan; it is
+    only replaced by an exact count when below USERS_EXACT_COUNT_BELOW, where counting
+    is cheap. Other databases always count.
+    """
+    query = _filtered(db, search, role).order_by(None)
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        compiled = query.statement.compile(dialect=connection.dialect)
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= settings.users_exact_count_below:
+            return estimate, True
+    return query.count(), False
@@ -0,0 +1,95 @@
+"""Measure per-message LLM client overhead against the local mock server.
+
+The mock answers instantly, so the numbers are what the client itself costs:
+building a Groq client (and its connection pool) per message versus reusing
+one pooled async client.
+
+Usage (from backend/):
+    python -m benchmarks.chat_client --requests 200 --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from anyio import to_thread
+from groq import Groq
+
+from app.core.config import settings
+from app.services import llm
+from benchmarks.mock_llm import create_app, serve_in_thread
+
+MESSAGES = [
+    {"role": "system", "content": "Tu es l'Assistant Eroz." * 40},
+    {"role": "user", "content": "Comment rejoindre une classe ?"},
+]
+
+
+def _per_call(base_url: str) -> None:
+    # What services.chat did before: a fresh client, pool and handshake per message.
+    client = Groq(api_key="mock", base_url=base_url)
+    client.chat.completions.create(model=settings.groq_model, messages=MESSAGES, max_tokens=500)
+
+
+async def _shared() -> None:
+    await llm.get_llm_client().chat.completions.create(model=settings.groq_model, messages=MESSAGES, max_tokens=500)
+
+
+async def _run(call, requests: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+def _report(name: str, latencies: list[float], elapsed: float) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:<16} {len(latencies) / elapsed:8.0f} msg/s  "
+        f"p50 {statistics.median(ordered) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+    )
+
+
+async def _bench(base_url: str, args) -> None:
+    # Warm both paths once so imports and the mock's first request are not measured.
+    await to_thread.run_sync(_per_call, base_url)
+    await _shared()
+
+    start = time.perf_counter()
+    latencies = await _run(lambda: to_thread.run_sync(_per_call, base_url), args.requests, args.concurrency)
+    _report("client per call", latencies, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    latencies = await _run(_shared, args.requests, args.concurrency)
+    _report("shared async", latencies, time.perf_counter() - start)
+
+    await llm.close_llm_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server, base_url = serve_in_thread(create_app())
+    settings.groq_base_url = base_url
+    settings.groq_api_key = "mock"
+    try:
+        asyncio.run(_bench(base_url, args))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Load-test the chat endpoints with N concurrent users.
+
+By default the API and the mock LLM both run in this process (SQLite in a temp
+directory), so the whole chat path is exercised offline: auth, context, FAQ,
+bulkhead, circuit breaker and the upstream client. The --max-concurrency,
+--max-queue, --queue-timeout, --llm-timeout and --retries flags set the matching
+CHAT_*/GROQ_* settings for that in-process API. Pass --api-url to drive an
+already running API instead; it then talks to whatever GROQ_BASE_URL it has.
+
+Usage (from backend/):
+    python -m benchmarks.chat_load --users 50 --turns 4 --mode stream --latency-ms 300 --token-ms 20
+    python -m benchmarks.chat_load --users 100 --error-rate 0.2 --max-concurrency 8
+    python -m benchmarks.chat_load --api-url http://127.0.0.1:3000 --users 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+MODES = {"chat": "/api/chat", "stream": "/api/chat/stream", "messages": "/api/chat/messages"}
+ADMIN = {"email": "admin@eroz.com", "password": "admin123"}
+
+
+@dataclass
+class Results:
+    latencies: list[float] = field(default_factory=list)
+    first_tokens: list[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+
+
+def _question(user: int, turn: int, repeat: bool) -> str:
+    # Distinct questions keep the response cache and request coalescing out of the numbers
+    # unless --repeat asks for them.
+    if repeat:
+        return "Quels signes radiologiques evoquent une pneumonie ?"
+    return f"Quels signes radiologiques evoquent une pneumonie dans le cas {user}-{turn} ?"
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _token(client: httpx.AsyncClient, run: str, index: int) -> str:
+    credentials = {"email": f"load-{run}-{index}@example.com", "password": "load-test"}
+    response = await client.post(
+        "/api/auth/register", json={"firstName": "Load", "lastName": f"User{index}", **credentials}
+    )
+    if response.status_code != 200:
+        response = await client.post("/api/auth/login", json=credentials)
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def _send(client: httpx.AsyncClient, mode: str, body: dict, results: Results) -> dict | None:
+    start = time.perf_counter()
+    if mode != "stream":
+        try:
+            response = await client.post(MODES[mode], json=body)
+        except httpx.HTTPError as exc:
+            results.outcomes[type(exc).__name__] += 1
+            return None
+        results.latencies.append(time.perf_counter() - start)
+        results.outcomes[str(response.status_code)] += 1
+        return response.json() if response.status_code == 200 else None
+
+    outcome, reply, first = None, [], None
+    try:
+        async with client.stream("POST", MODES[mode], json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                outcome = str(response.status_code)
+            else:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif line.startswith("data: ") and event == "delta":
+                        if first is None:
+                            first = time.perf_counter() - start
+                        reply.append(json.loads(line[6:])["content"])
+                    elif line.startswith("data: ") and event in ("done", "error"):
+                        outcome = "200" if event == "done" else "200 + error event"
+    except httpx.HTTPError as exc:
+        results.outcomes[type(exc).__name__] += 1
+        return None
+    results.latencies.append(time.perf_counter() - start)
+    results.outcomes[outcome or "200 truncated"] += 1
+    if first is not None:
+        results.first_tokens.append(first)
+    return {"message": "".join(reply)} if outcome == "200" else None
+
+
+async def _user(client: httpx.AsyncClient, token: str, index: int, args, results: Results) -> None:
+    client.headers["Authorization"] = f"Bearer {token}"
+    history: list[dict] = []
+    for turn in range(args.turns):
+        question = _question(index, turn, args.repeat)
+        if args.mode == "messages":
+            body = {"message": question}
+        else:
+            history.append({"role": "user", "content": question})
+            body = {"messages": history}
+        reply = await _send(client, args.mode, body, results)
+        if args.mode != "messages":
+            if reply is None:
+                history.pop()
+            else:
+                history.append({"role": "assistant", "content": reply["message"]})
+        if args.think_ms:
+            await asyncio.sleep(args.think_ms / 1000)
+
+
+async def _run(base_url: str, args) -> tuple[Results, float, dict | None]:
+    run = secrets.token_hex(3)
+    limits = httpx.Limits(max_connections=args.users + 4, max_keepalive_connections=args.users + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as setup:
+        semaphore = asyncio.Semaphore(8)
+
+        async def token(index: int) -> str:
+            async with semaphore:
+                return await _token(setup, run, index)
+
+        tokens = await asyncio.gather(*(token(i) for i in range(args.users)))
+
+    results = Results()
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) for _ in range(args.users)]
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(_user(c, t, i, args, results) for i, (c, t) in enumerate(zip(clients, tokens))))
+    finally:
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*(c.aclose() for c in clients))
+
+    metrics = None
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as admin:
+        login = await admin.post("/api/auth/login", json=ADMIN)
+        if login.status_code == 200:
+            response = await admin.get(
+                "/api/chat/metrics", headers={"Authorization": f"Bearer {login.json()['token']}"}
+            )
+            metrics = response.json() if response.status_code == 200 else None
+    return results, elapsed, metrics
+
+
+def _report(args, results: Results, elapsed: float, metrics: dict | None, upstream=None) -> None:
+    total = sum(results.outcomes.values())
+    ok = results.outcomes.get("200", 0)
+    print(f"mode={args.mode} users={args.users} turns={args.turns}")
+    print(f"requests   {total} in {elapsed:.2f}s: {total / elapsed:7.1f} req/s, {ok / elapsed:7.1f} ok/s")
+    print(
+        f"latency    p50 {_pct(results.latencies, 0.5) * 1000:7.1f} ms  "
+        f"p99 {_pct(results.latencies, 0.99) * 1000:7.1f} ms  "
+        f"max {max(results.latencies, default=0) * 1000:7.1f} ms"
+    )
+    if results.first_tokens:
+        print(
+            f"1st token  p50 {_pct(results.first_tokens, 0.5) * 1000:7.1f} ms  "
+            f"p99 {_pct(results.first_tokens, 0.99) * 1000:7.1f} ms"
+        )
+    print("outcomes   " + ", ".join(f"{k}: {v}" for k, v in sorted(results.outcomes.items())))
+    if upstream is not None:
+        print(f"upstream   {upstream.requests} calls (SDK retries included), {upstream.errors} injected errors")
+    if metrics:
+        bulkhead, breaker = metrics.get("bulkhead", {}), metrics.get("circuitBreaker", {})
+        print(f"bulkhead   {json.dumps(bulkhead)}")
+        print(f"breaker    {json.dumps(breaker)}")
+        print(f"coalescing {json.dumps(metrics.get('coalescing', {}))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--mode", choices=sorted(MODES), default="chat")
+    parser.add_argument("--repeat", action="store_true", help="every user asks the same question")
+    parser.add_argument("--think-ms", type=float, default=0, help="pause between a user's turns")
+    parser.add_argument("--timeout", type=float, default=120, help="client-side request timeout")
+    parser.add_argument("--api-url", default=None, help="drive a running API instead of an in-process one")
+    # Mock LLM, in-process runs only.
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--reply-tokens", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-status", type=int, default=500, choices=(429, 500, 502, 503))
+    # API settings under test, in-process runs only.
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--max-queue", type=int, default=None)
+    parser.add_argument("--queue-timeout", type=float, default=None)
+    parser.add_argument("--llm-timeout", type=float, default=None)
+    parser.add_argument("--retries", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.api_url:
+        results, elapsed, metrics = asyncio.run(_run(args.api_url.rstrip("/"), args))
+        _report(args, results, elapsed, metrics)
+        return
+
+    from benchmarks.mock_llm import create_app, serve_in_thread
+
+    mock = create_app(
+        args.latency_ms,
+        args.token_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        reply_tokens=args.reply_tokens,
+        seed=0,
+    )
+    mock_server, mock_url = serve_in_thread(mock)
+    with tempfile.TemporaryDirectory() as root:
+        # Settings are read once at import, so the environment is prepared before app.main loads.
+        overrides = {
+            "DATABASE_URL": f"sqlite:///{os.path.join(root, 'load.db')}",
+            "UPLOAD_DIR": os.path.join(root, "uploads"),
+            "GROQ_BASE_URL": mock_url,
+            "GROQ_API_KEY": "mock",
+            "CHAT_MAX_CONCURRENCY": args.max_concurrency,
+            "CHAT_MAX_QUEUE": args.max_queue,
+            "CHAT_QUEUE_TIMEOUT_SECONDS": args.queue_timeout,
+            "GROQ_TIMEOUT_SECONDS": args.llm_timeout,
+            "GROQ_MAX_RETRIES": args.retries,
+        }
+        os.environ.update({key: str(value) for key, value in overrides.items() if value is not None})
+
+        from app.main import app
+
+        api_server, api_url = serve_in_thread(app)
+        try:
+            results, elapsed, metrics = asyncio.run(_run(api_url, args))
+        finally:
+            api_server.should_exit = True
+            mock_server.should_exit = True
+    _report(args, results, elapsed, metrics, mock.state)
+
+
+if __name__ == "__main__":
+    main()
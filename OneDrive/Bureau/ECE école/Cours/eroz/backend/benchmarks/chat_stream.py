@@ -0,0 +1,67 @@
+"""Compare perceived chat latency of the blocking and streaming paths.
+
+The mock server waits --latency-ms before the first token, then --token-ms
+per token, roughly like a hosted model.
+
+Usage (from backend/):
+    python -m benchmarks.chat_stream --latency-ms 300 --token-ms 30 --runs 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.services import llm
+from app.services.chat import generate_chat_response, stream_chat_response
+from benchmarks.mock_llm import create_app, serve_in_thread
+
+MESSAGES = [{"role": "user", "content": "Comment rejoindre une classe ?"}]
+SYSTEM_PROMPT = "Tu es l'Assistant Eroz."
+
+
+async def _bench(runs: int) -> None:
+    blocking: list[float] = []
+    first_token: list[float] = []
+    complete: list[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await generate_chat_response(messages=MESSAGES, system_prompt=SYSTEM_PROMPT)
+        blocking.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        first = None
+        async for _delta in stream_chat_response(messages=MESSAGES, system_prompt=SYSTEM_PROMPT):
+            if first is None:
+                first = time.perf_counter() - start
+        first_token.append(first or 0.0)
+        complete.append(time.perf_counter() - start)
+    await llm.close_llm_client()
+
+    print(f"blocking   first text after {statistics.median(blocking) * 1000:7.1f} ms (p50)")
+    print(
+        f"streaming  first text after {statistics.median(first_token) * 1000:7.1f} ms (p50), "
+        f"complete after {statistics.median(complete) * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=30)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    server, base_url = serve_in_thread(create_app(args.latency_ms, args.token_ms))
+    settings.groq_base_url = base_url
+    settings.groq_api_key = "mock"
+    try:
+        asyncio.run(_bench(args.runs))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
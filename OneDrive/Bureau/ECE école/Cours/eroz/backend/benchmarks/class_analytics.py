@@ -0,0 +1,68 @@
+"""Time the vectorized class and series statistics on a synthetic large class.
+
+Only the NumPy part is measured; the DB side is one column query per input.
+
+Usage (from backend/):
+    python -m benchmarks.class_analytics --students 5000 --series 40
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.analytics import class_stats, series_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--series", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    student_ids = np.arange(1, args.students + 1) * 3
+    series_ids = np.arange(1, args.series + 1) * 7
+    pairs = rng.random((args.students, args.series)) < 0.8  # 80% started
+    progress_student = np.repeat(student_ids, args.series)[pairs.ravel()]
+    progress_series = np.tile(series_ids, args.students)[pairs.ravel()]
+    rows = progress_student.size
+    completed = rng.random(rows) < 0.7
+    precision = np.clip(rng.normal(72, 15, rows), 0, 100)
+    score = precision * 10
+    seconds = rng.gamma(2, 300, args.students)
+    sessions = rng.integers(0, 80, args.students).astype(np.float64)
+
+    class_times, series_times = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        class_stats(
+            student_ids,
+            series_ids,
+            progress_student,
+            progress_series,
+            completed,
+            precision,
+            score,
+            student_ids,
+            seconds,
+            sessions,
+        )
+        class_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        series_stats(completed[: args.students], precision[: args.students], score[: args.students], seconds)
+        series_times.append(time.perf_counter() - start)
+
+    print(
+        f"class  {args.students} students x {args.series} series ({rows} rows): "
+        f"{statistics.median(class_times) * 1000:6.2f} ms (p50)"
+    )
+    print(f"series {args.students} students: {statistics.median(series_times) * 1000:6.2f} ms (p50)")
+
+
+if __name__ == "__main__":
+    main()
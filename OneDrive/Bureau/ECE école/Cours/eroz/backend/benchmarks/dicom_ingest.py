@@ -0,0 +1,109 @@
+"""Benchmark DICOM archive rendering on a synthetic CT study.
+
+Usage (from backend/):
+    python -m benchmarks.dicom_ingest --slices 500 --size 512
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import resource
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import CTImageStorage, ExplicitVRLittleEndian, generate_uid
+
+from app.services.dicom import render_dicom_archive
+
+
+def _make_slice(index: int, size: int, series_uid: str, study_uid: str) -> bytes:
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = CTImageStorage
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    ds = Dataset()
+    ds.file_meta = meta
+    ds.SOPClassUID = CTImageStorage
+    ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+    ds.StudyInstanceUID = study_uid
+    ds.SeriesInstanceUID = series_uid
+    ds.Modality = "CT"
+    ds.InstanceNumber = index + 1
+    ds.ImagePositionPatient = [0, 0, -index * 1.25]
+    ds.Rows = size
+    ds.Columns = size
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 12
+    ds.HighBit = 11
+    ds.PixelRepresentation = 0
+    ds.RescaleIntercept = -1024
+    ds.RescaleSlope = 1
+
+    yy, xx = np.mgrid[0:size, 0:size]
+    radius = np.hypot(xx - size / 2, yy - size / 2)
+    phantom = np.where(radius < size * 0.45, 1064, 24).astype(np.uint16)
+    phantom[radius < size * (0.1 + 0.1 * np.sin(index / 40))] = 1500
+    noise = np.random.default_rng(index).integers(0, 40, size=(size, size), dtype=np.uint16)
+    ds.PixelData = (phantom + noise).tobytes()
+
+    buffer = io.BytesIO()
+    ds.save_as(buffer, enforce_file_format=True)
+    return buffer.getvalue()
+
+
+def build_study(path: str, slices: int, size: int) -> None:
+    series_uid, study_uid = generate_uid(), generate_uid()
+    # Shuffle member order so the benchmark also exercises the InstanceNumber re-sort.
+    order = np.random.default_rng(0).permutation(slices)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for index in order:
+            zf.writestr(f"study/IM{index:05d}.dcm", _make_slice(int(index), size, series_uid, study_uid))
+
+
+def run(path: str, workers: int, preset: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    count = 0
+    with open(path, "rb") as archive:
+        for rendered in render_dicom_archive(archive, preset=preset, workers=workers):
+            count += 1
+            del rendered
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, default=500)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--preset", default="brain")
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "study.zip")
+        start = time.perf_counter()
+        build_study(path, args.slices, args.size)
+        print(
+            f"synthetic study: {args.slices} slices {args.size}x{args.size}, "
+            f"{os.path.getsize(path) / 1e6:.1f} MB zipped, built in {time.perf_counter() - start:.1f}s"
+        )
+
+        for workers in args.workers:
+            elapsed, count = run(path, workers, args.preset)
+            print(
+                f"workers={workers:<3} slices={count} total={elapsed:.2f}s "
+                f"({count / elapsed:.0f} slices/s, {elapsed / count * 1000:.1f} ms/slice)"
+            )
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS (parent process): {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
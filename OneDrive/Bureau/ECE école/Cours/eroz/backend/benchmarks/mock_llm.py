@@ -0,0 +1,166 @@
+"""OpenAI/Groq-compatible stand-in for the chat completions API.
+
+Latency, per-token delay, reply length and an injected error rate are configurable,
+so chat concurrency and timeouts can be tuned without a real GROQ_API_KEY.
+
+Usage (from backend/):
+    python -m benchmarks.mock_llm --port 8090 --latency-ms 200 --token-ms 20 --error-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8090 GROQ_API_KEY=mock uvicorn app.main:app
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = "Pour rejoindre une classe, va dans **Mes classes** et entre le code donne par ton professeur."
+TOKENS = re.findall(r"\S+\s*", REPLY)
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason: str | None = None) -> bytes:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+def _reply_tokens(count: int | None) -> list[str]:
+    if not count:
+        return TOKENS
+    words = [token if token[-1].isspace() else token + " " for token in TOKENS]
+    return [words[i % len(words)] for i in range(count)]
+
+
+def _error(status: int) -> JSONResponse:
+    # Same envelope as the hosted API, so the SDK raises its usual APIStatusError subclass.
+    kind = "rate_limit_exceeded" if status == 429 else "internal_server_error"
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": f"mock {kind}", "type": kind, "code": kind}},
+        headers={"Retry-After": "1"} if status == 429 else None,
+    )
+
+
+def create_app(
+    latency_ms: float = 0,
+    token_ms: float = 0,
+    *,
+    error_rate: float = 0,
+    error_status: int = 500,
+    reply_tokens: int | None = None,
+    seed: int | None = None,
+) -> FastAPI:
+    app = FastAPI()
+    tokens = _reply_tokens(reply_tokens)
+    reply = "".join(tokens)
+    rng = random.Random(seed)
+    # Streams dropped by the caller before the last token; lets tests check cancellation.
+    app.state.cancelled_streams = 0
+    # Upstream view of a load test: calls made (SDK retries included) and errors injected.
+    app.state.requests = 0
+    app.state.errors = 0
+
+    async def stream_reply(completion_id: str, model: str):
+        try:
+            yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for token in tokens:
+                if token_ms:
+                    await asyncio.sleep(token_ms / 1000)
+                yield _chunk(completion_id, model, {"content": token})
+            yield _chunk(completion_id, model, {}, "stop")
+            yield b"data: [DONE]\n\n"
+        except asyncio.CancelledError:
+            app.state.cancelled_streams += 1
+            raise
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        app.state.requests += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and rng.random() < error_rate:
+            app.state.errors += 1
+            return _error(error_status)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = payload.get("model", "mock")
+        if payload.get("stream"):
+            return StreamingResponse(stream_reply(completion_id, model), media_type="text/event-stream")
+
+        if token_ms:
+            await asyncio.sleep(token_ms * len(tokens) / 1000)
+        prompt_tokens = sum(len(m.get("content", "")) // 4 for m in payload.get("messages", []))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        }
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app: FastAPI, port: int | None = None) -> tuple[uvicorn.Server, str]:
+    port = port or _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=0, help="delay between tokens")
+    parser.add_argument("--reply-tokens", type=int, default=None, help="reply length in tokens")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of calls that fail, 0..1")
+    parser.add_argument("--error-status", type=int, default=500, choices=(429, 500, 502, 503))
+    args = parser.parse_args()
+    app = create_app(
+        args.latency_ms,
+        args.token_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        reply_tokens=args.reply_tokens,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Compare progress page loads: four parallel calls versus /progress/dashboard.
+
+The API runs in-process over real HTTP on a throwaway SQLite database seeded as
+usual; --database-url points it at another database instead (e.g. PostgreSQL).
+
+Usage (from backend/):
+    python -m benchmarks.progress_dashboard --pages 300 --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+LEGACY = [
+    "/api/progress/stats",
+    "/api/progress/sessions?limit=6",
+    "/api/progress/weekly-activity",
+    "/api/progress/xp-progress",
+]
+DASHBOARD = "/api/progress/dashboard?limit=6"
+STUDENT = {"email": "thomas.martin@edu.fr", "password": "student123"}
+# SQL statements executed by the in-process API.
+QUERIES = [0]
+
+
+async def _legacy(client: httpx.AsyncClient, etag: str | None) -> tuple[int, str | None]:
+    responses = await asyncio.gather(*(client.get(url) for url in LEGACY))
+    return sum(len(r.content) for r in responses), None
+
+
+async def _dashboard(client: httpx.AsyncClient, etag: str | None) -> tuple[int, str | None]:
+    response = await client.get(DASHBOARD, headers={"If-None-Match": etag} if etag else None)
+    return len(response.content), response.headers.get("etag")
+
+
+async def _bench(base_url: str, load, pages: int, concurrency: int, revalidate: bool) -> tuple[list[float], int, int]:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        login = await client.post("/api/auth/login", json=STUDENT)
+        client.headers["Authorization"] = f"Bearer {login.json()['token']}"
+        _, etag = await load(client, None)
+        etag = etag if revalidate else None
+        before = QUERIES[0]
+
+        timings: list[float] = []
+        transferred = 0
+        remaining = pages
+
+        async def worker() -> None:
+            nonlocal remaining, transferred
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                size, _ = await load(client, etag)
+                timings.append(time.perf_counter() - start)
+                transferred += size
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return timings, transferred, QUERIES[0] - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        # Settings are read once at import, so the environment is prepared before app.main loads.
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(root, 'bench.db')}"
+        os.environ["UPLOAD_DIR"] = os.path.join(root, "uploads")
+
+        from sqlalchemy import event
+
+        from app.core.database import engine
+        from app.main import app
+        from benchmarks.mock_llm import serve_in_thread
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(*_args) -> None:
+            QUERIES[0] += 1
+
+        server, base_url = serve_in_thread(app)
+        try:
+            for name, load, revalidate in (
+                ("4 calls", _legacy, False),
+                ("dashboard", _dashboard, False),
+                ("dashboard 304", _dashboard, True),
+            ):
+                start = time.perf_counter()
+                timings, transferred, queries = asyncio.run(
+                    _bench(base_url, load, args.pages, args.concurrency, revalidate)
+                )
+                elapsed = time.perf_counter() - start
+                timings.sort()
+                print(
+                    f"{name:<14} p50 {statistics.median(timings) * 1000:6.1f} ms  "
+                    f"p95 {timings[int(len(timings) * 0.95)] * 1000:6.1f} ms  "
+                    f"{args.pages / elapsed:6.0f} pages/s  "
+                    f"{queries / args.pages:4.1f} queries/page  "
+                    f"{transferred / args.pages / 1e3:5.1f} KB/page"
+                )
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Time the streamed stats rebuild on a synthetic training_sessions table.
+
+Sessions are written to a throwaway SQLite database (or --database-url, e.g. a
+scratch PostgreSQL) and every user_stats row is rebuilt from them; peak Python
+memory is reported to show it follows --chunk-size, not the table size.
+
+Usage (from backend/):
+    python -m benchmarks.stats_rebuild --users 20000 --sessions 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="eroz-stats-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp}/bench.db"
+
+    from sqlalchemy import insert
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import TrainingSession, User, UserStats
+    from app.services.stats_rebuild import rebuild_all_stats
+
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        now = datetime.utcnow()
+        conn.execute(
+            insert(User),
+            [
+                {"id": i, "email": f"bench{i}@eroz.test", "password": "-", "firstName": "B", "lastName": str(i),
+                 "role": "STUDENT", "createdAt": now, "updatedAt": now}
+                for i in range(1, args.users + 1)
+            ],
+        )
+        conn.execute(insert(UserStats), [{"userId": i} for i in range(1, args.users + 1)])
+        origin = datetime(2024, 1, 1)
+        for offset in range(0, args.sessions, 100_000):
+            n = min(100_000, args.sessions - offset)
+            users = rng.integers(1, args.users + 1, n)
+            minutes = rng.integers(0, 730 * 24 * 60, n)
+            precision = rng.uniform(0, 100, n)
+            conn.execute(
+                insert(TrainingSession),
+                [
+                    {"userId": int(u), "difficulty": "MEDIUM", "precision": float(p), "duration": 120,
+                     "totalImages": 10, "correctAnswers": int(p // 10), "baseScore": 100, "multiplier": 1.0,
+                     "xpEarned": int(p), "completedAt": origin + timedelta(minutes=int(m))}
+                    for u, m, p in zip(users, minutes, precision)
+                ],
+            )
+    print(f"setup  {args.sessions} sessions, {args.users} users: {time.perf_counter() - start:.1f}s")
+
+    db = SessionLocal()
+    tracemalloc.start()
+    start = time.perf_counter()
+    report = rebuild_all_stats(db, chunk_size=args.chunk_size)
+    db.commit()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    print(
+        f"rebuild chunk={args.chunk_size}: {elapsed:.1f}s "
+        f"({report.sessions / elapsed:,.0f} sessions/s), changed={report.changed}, "
+        f"peak python memory {peak / 2**20:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
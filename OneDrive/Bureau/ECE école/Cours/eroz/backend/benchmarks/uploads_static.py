@@ -0,0 +1,136 @@
+"""Compare the plain StaticFiles mount with UploadsStaticFiles over real HTTP.
+
+Usage (from backend/):
+    python -m benchmarks.uploads_static --images 200 --image-kb 300 --concurrency 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+from app.core.uploads import UploadsStaticFiles
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(static_cls, directory: str) -> tuple[uvicorn.Server, str]:
+    app = FastAPI()
+    app.mount("/uploads", static_cls(directory=directory), name="uploads")
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def _write_blob(root: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    rel = f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.png"
+    os.makedirs(os.path.join(root, os.path.dirname(rel)), exist_ok=True)
+    with open(os.path.join(root, rel), "wb") as handle:
+        handle.write(data)
+    return f"/uploads/{rel}"
+
+
+async def _fetch_all(base: str, urls: list[str], concurrency: int, headers_for=None) -> tuple[float, int, int]:
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    transferred = 0
+    requests = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal transferred, requests
+        while not queue.empty():
+            url = queue.get_nowait()
+            headers = headers_for(url) if headers_for else None
+            if headers is False:
+                continue  # fresh in the browser cache, no request at all
+            response = await client.get(url, headers=headers)
+            transferred += len(response.content)
+            requests += 1
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return time.perf_counter() - start, requests, transferred
+
+
+async def _ranged(base: str, url: str, size: int, chunk: int) -> tuple[float, int]:
+    transferred = 0
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        for offset in range(0, size, chunk):
+            response = await client.get(url, headers={"Range": f"bytes={offset}-{offset + chunk - 1}"})
+            transferred += len(response.content)
+    return time.perf_counter() - start, transferred
+
+
+async def _bench(name: str, base: str, urls: list[str], etags: dict[str, str], big: str, big_size: int, args) -> None:
+    elapsed, requests, transferred = await _fetch_all(base, urls, args.concurrency)
+    print(
+        f"{name:<10} cold load : {requests / elapsed:8.0f} req/s {transferred / elapsed / 1e6:8.1f} MB/s"
+    )
+
+    async with httpx.AsyncClient(base_url=base) as client:
+        cache_control = (await client.head(urls[0])).headers.get("cache-control", "")
+
+    def revalidate(url: str):
+        if "immutable" in cache_control:
+            return False
+        return {"If-None-Match": etags[url]}
+
+    elapsed, requests, transferred = await _fetch_all(base, urls, args.concurrency, revalidate)
+    print(
+        f"{name:<10} warm load : {requests:5d} requests {elapsed * 1000:8.1f} ms per page "
+        f"({transferred / 1e3:.0f} KB)"
+    )
+
+    elapsed, transferred = await _ranged(base, big, big_size, 1024 * 1024)
+    print(
+        f"{name:<10} 1MB ranges: {transferred / 1e6:8.1f} MB moved for a {big_size / 1e6:.0f} MB file "
+        f"in {elapsed:.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--image-kb", type=int, default=300)
+    parser.add_argument("--big-mb", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        urls = [_write_blob(root, os.urandom(args.image_kb * 1024)) for _ in range(args.images)]
+        big = _write_blob(root, os.urandom(args.big_mb * 1024 * 1024))
+        big_size = args.big_mb * 1024 * 1024
+
+        for name, static_cls in (("basic", StaticFiles), ("optimized", UploadsStaticFiles)):
+            server, base = _serve(static_cls, root)
+            try:
+                with httpx.Client(base_url=base) as client:
+                    etags = {url: client.head(url).headers["etag"] for url in urls}
+                asyncio.run(_bench(name, base, urls, etags, big, big_size, args))
+            finally:
+                server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
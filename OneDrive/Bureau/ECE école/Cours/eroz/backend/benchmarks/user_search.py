@@ -0,0 +1,113 @@
+"""Time admin user list pages (first page, deep page, role filter, searches) at scale.
+
+Users are generated into a throwaway SQLite database, or into --database-url (point it
+at a scratch PostgreSQL to measure the trigram index and count estimates).
+
+Usage (from backend/):
+    python -m benchmarks.user_search --users 1000000 --database-url postgresql://...
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+FIRST = ["Thomas", "Julie", "Lucas", "Emma", "Hugo", "Chloe", "Nathan", "Lea", "Louis", "Manon"]
+LAST = ["Martin", "Bernard", "Dubois", "Moreau", "Laurent", "Garcia", "Roux", "Fournier", "Girard", "Bonnet"]
+SCENARIOS = [
+    ("first page", {}),
+    ("role=PROF", {"role": "PROF"}),
+    ("search 'martin'", {"search": "martin"}),
+    ("search 'emma bonnet'", {"search": "emma bonnet"}),
+    ("search email '000042'", {"search": "000042"}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="eroz-users-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp}/bench.db"
+
+    from sqlalchemy import func, insert
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import User
+    from app.services.user_search import count_users, prepare_search, user_page
+
+    prepare_search(engine)
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    existing = db.query(func.count(User.id)).scalar()
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    origin = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(existing, args.users, 50_000):
+            n = min(50_000, args.users - offset)
+            first = rng.integers(0, len(FIRST), n)
+            last = rng.integers(0, len(LAST), n)
+            roles = rng.choice(["STUDENT", "PROF", "ADMIN"], n, p=[0.95, 0.045, 0.005])
+            conn.execute(
+                insert(User),
+                [
+                    {
+                        "email": f"{FIRST[f].lower()}.{LAST[l].lower()}{offset + i:06d}@edu.fr",
+                        "password": "-",
+                        "firstName": FIRST[f],
+                        "lastName": LAST[l],
+                        "role": str(role),
+                        "createdAt": origin + timedelta(minutes=offset + i),
+                        "updatedAt": origin,
+                    }
+                    for i, (f, l, role) in enumerate(zip(first, last, roles))
+                ],
+            )
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE users")
+    print(f"setup  {args.users} users ({args.users - existing} inserted): {time.perf_counter() - start:.1f}s")
+
+    for name, filters in SCENARIOS:
+        pages, counts, deep = [], [], []
+        total = estimated = None
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            rows, cursor = user_page(db, 50, **filters)
+            pages.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            total, estimated = count_users(db, **filters)
+            counts.append(time.perf_counter() - t0)
+            if cursor:
+                # Ten pages in: keyset cost should not depend on depth.
+                for _ in range(9):
+                    rows, cursor = user_page(db, 50, cursor=cursor, **filters)
+                    if not cursor:
+                        break
+                if cursor:
+                    t0 = time.perf_counter()
+                    user_page(db, 50, cursor=cursor, **filters)
+                    deep.append(time.perf_counter() - t0)
+        deep_ms = f"{statistics.median(deep) * 1000:7.2f}" if deep else "      -"
+        print(
+            f"{name:24} page {statistics.median(pages) * 1000:7.2f} ms  page 11 {deep_ms} ms  "
+            f"count {statistics.median(counts) * 1000:7.2f} ms  total={'~' if estimated else ''}{total}"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
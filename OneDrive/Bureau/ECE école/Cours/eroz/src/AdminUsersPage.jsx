@@ -9,6 +9,10 @@ const AdminUsersPage = () => {
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
     const [debouncedSearch, setDebouncedSearch] = useState('');
+    const [roleFilter, setRoleFilter] = useState('');
+    const [nextCursor, setNextCursor] = useState(null);
+    const [total, setTotal] = useState({ count: 0, estimated: false });
+    const [loadingMore, setLoadingMore] = useState(false);
 
     // Debounce search input
     useEffect(() => {
@@ -20,14 +24,27 @@ const AdminUsersPage = () => {
 
     useEffect(() => {
         fetchUsers();
-    }, [debouncedSearch]);
+    }, [debouncedSearch, roleFilter]);
+
+    // Pages of 50, newest first; the API hands out the next page's cursor in a header.
+    const fetchPage = (cursor) => {
+        const params = { limit: 50 };
+        if (debouncedSearch) params.search = debouncedSearch;
+        if (roleFilter) params.role = roleFilter;
+        if (cursor) params.cursor = cursor;
+        return client.get('/users', { params });
+    };
 
     const fetchUsers = async () => {
         try {
             setLoading(true);
-            const params = debouncedSearch ? `?search=${encodeURIComponent(debouncedSearch)}` : '';
-            const { data } = await client.get(`/users${params}`);
+            const { data, headers } = await fetchPage(null);
             setUsers(data);
+            setNextCursor(headers['x-next-cursor'] || null);
+            setTotal({
+                count: Number(headers['x-total-count'] ?? data.length),
+                estimated: headers['x-total-count-estimated'] === 'true',
+            });
         } catch (error) {
             console.error('Failed to fetch users', error);
         } finally {
@@ -35,6 +52,19 @@ const AdminUsersPage = () => {
         }
     };
 
+    const loadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const { data, headers } = await fetchPage(nextCursor);
+            setUsers((current) => [...current, ...data]);
+            setNextCursor(headers['x-next-cursor'] || null);
+        } catch (error) {
+            console.error('Failed to fetch users', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleRoleChange = async (userId, newRole) => {
         try {
             await client.put(`/users/${userId}/role`, { role: newRole });
@@ -50,6 +80,7 @@ const AdminUsersPage = () => {
             try {
                 await client.delete(`/users/${userId}`);
                 setUsers(users.filter(u => u.id !== userId));
+                setTotal((current) => ({ ...current, count: Math.max(current.count - 1, 0) }));
             } catch (error) {
                 console.error('Failed to delete user', error);
                 alert('Erreur lors de la suppression de l\'utilisateur');
@@ -86,8 +117,18 @@ const AdminUsersPage = () => {
                                 className="pl-10 pr-4 py-2 border border-slate-200 rounded-lg shadow-sm focus:outline-none focus:ring-2 focus:ring-medical-500 focus:border-transparent w-64 md:w-80 text-sm"
                             />
                         </div>
+                        <select
+                            value={roleFilter}
+                            onChange={(e) => setRoleFilter(e.target.value)}
+                            className="px-3 py-2 border border-slate-200 rounded-lg shadow-sm focus:outline-none focus:ring-2 focus:ring-medical-500 text-sm"
+                        >
+                            <option value="">Tous les rôles</option>
+                            <option value="STUDENT">STUDENT</option>
+                            <option value="PROF">PROF</option>
+                            <option value="ADMIN">ADMIN</option>
+                        </select>
                         <div className="bg-white px-4 py-2 rounded-lg shadow-sm border border-slate-200 text-sm font-medium text-slate-600">
-                            Total: {users.length}
+                            Total: {total.estimated ? '~' : ''}{total.count.toLocaleString()}
                         </div>
                     </div>
                 </header>
@@ -163,6 +204,17 @@ const AdminUsersPage = () => {
                             </tbody>
                         </table>
                     </div>
+                    {nextCursor && !loading && (
+                        <div className="p-4 border-t border-slate-100 text-center">
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="px-4 py-2 text-sm font-medium text-medical-600 hover:bg-medical-50 rounded-lg transition-colors disabled:opacity-50"
+                            >
+                                {loadingMore ? 'Chargement...' : 'Charger plus'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
         </div>
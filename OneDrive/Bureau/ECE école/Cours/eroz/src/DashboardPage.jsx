@@ -30,16 +30,11 @@ const DashboardPage = () => {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const [statsRes, sessionsRes, activityRes, xpRes] = await Promise.all([
-                    client.get('/progress/stats'),
-                    client.get('/progress/sessions?limit=6'),
-                    client.get('/progress/weekly-activity'),
-                    client.get('/progress/xp-progress'),
-                ])
-                setStats(statsRes.data)
-                setSessions(sessionsRes.data)
-                setWeeklyActivity(activityRes.data)
-                setXpProgress(xpRes.data)
+                const { data } = await client.get('/progress/dashboard?limit=6')
+                setStats(data.stats)
+                setSessions(data.sessions)
+                setWeeklyActivity(data.weeklyActivity)
+                setXpProgress(data.xpProgress)
             } catch (error) {
                 console.error('Failed to fetch progress data:', error)
             } finally {